@@ -0,0 +1,193 @@
+"""
+End-to-end load benchmark for the Questly API.
+
+Runs the real FastAPI app in-process against an in-memory MongoDB stand-in and the
+offline LLM provider, then drives register -> login -> repeated /auth/user polls ->
+/analyze-career for many concurrent simulated students. Reports p50/p95/p99 latency and
+throughput per endpoint plus event-loop lag, so hot-path regressions show up as numbers.
+
+    cd backend && python benchmarks/bench_api.py --users 200 --concurrency 50 --llm-latency-ms 800
+
+By default students share a handful of interests, so most analyses are cache hits. Pass
+--unique-inputs to give every student a distinct input and turn the semantic cache off,
+so every analysis goes through generation. Use --json to get machine-readable output
+for comparing runs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import motor.motor_asyncio
+
+from memory_db import MemoryClient
+
+INTERESTS = [
+    "I love coding and maths",
+    "I like computers and games",
+    "Biology and helping people in hospitals",
+    "I enjoy building things and fixing engines",
+    "Psychology, people and listening to friends",
+    "Business, money and running my own company",
+]
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+    
+    async def timed(self, name: str, call):
+        start = time.perf_counter()
+        response = await call
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return response
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+def student_input(number: int, unique: bool) -> str:
+    interest = INTERESTS[number % len(INTERESTS)]
+    return f"{interest} (student {number})" if unique else interest
+
+async def simulate_student(client, recorder: Recorder, number: int, polls: int, unique_inputs: bool):
+    email = f"student{number}@school.example"
+    password = "matric2025"
+    
+    await recorder.timed("POST /api/auth/register", client.post("/api/auth/register", json={
+        "email": email, "password": password, "name": f"Student {number}"
+    }))
+    response = await recorder.timed("POST /api/auth/login", client.post("/api/auth/login", json={
+        "email": email, "password": password
+    }))
+    headers = {"Authorization": f"Bearer {response.json().get('session_token', '')}"}
+    
+    for _ in range(polls):
+        await recorder.timed("GET /api/auth/user", client.get("/api/auth/user", headers=headers))
+    
+    await recorder.timed("POST /api/analyze-career", client.post(
+        "/api/analyze-career",
+        json={"userInput": student_input(number, unique_inputs)},
+        headers=headers
+    ))
+
+async def run(args) -> dict:
+    # Stand-ins must be in place before server.py builds its clients and services
+    motor.motor_asyncio.AsyncIOMotorClient = MemoryClient
+    os.environ.setdefault("MONGO_URL", "memory://")
+    os.environ.setdefault("DB_NAME", "questly_bench")
+    os.environ["LLM_PROVIDER"] = "offline"
+    os.environ["OFFLINE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["OFFLINE_LLM_LATENCY_JITTER_MS"] = str(args.llm_latency_ms / 4)
+    os.environ["OFFLINE_LLM_ERROR_RATE"] = str(args.llm_error_rate)
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["ANALYSIS_JOB_STORE"] = "memory"
+    # Every simulated user shares one client IP
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    if args.unique_inputs:
+        # Near-identical unique inputs would otherwise all be semantic cache hits
+        os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    
+    import httpx
+    import server
+    
+    # Per-request info logs would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    recorder = Recorder()
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    
+    for handler in server.app.router.on_startup:
+        await handler()
+    
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        lag_task = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+        semaphore = asyncio.Semaphore(args.concurrency)
+        
+        async def bounded(number: int):
+            async with semaphore:
+                await simulate_student(client, recorder, number, args.polls, args.unique_inputs)
+        
+        start = time.perf_counter()
+        await asyncio.gather(*[bounded(i) for i in range(args.users)])
+        elapsed = time.perf_counter() - start
+        
+        stop.set()
+        await lag_task
+    
+    for handler in server.app.router.on_shutdown:
+        await handler()
+    
+    endpoints = {}
+    for name, samples in recorder.latencies.items():
+        endpoints[name] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(name, 0),
+            "throughput_rps": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+        }
+    
+    return {
+        "config": vars(args),
+        "elapsed_s": elapsed,
+        "total_requests": sum(len(s) for s in recorder.latencies.values()),
+        "event_loop_lag_ms": {
+            "mean": statistics.fmean(lag_samples) * 1000 if lag_samples else 0.0,
+            "p99": percentile(lag_samples, 99) * 1000 if lag_samples else 0.0,
+            "max": max(lag_samples) * 1000 if lag_samples else 0.0,
+        },
+        "endpoints": endpoints,
+    }
+
+def print_report(report: dict):
+    print(f"{report['total_requests']} requests in {report['elapsed_s']:.2f}s "
+          f"({report['total_requests'] / report['elapsed_s']:.1f} req/s)")
+    print(f"{'endpoint':<28}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<28}{stats['requests']:>7}{stats['errors']:>6}{stats['throughput_rps']:>9.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    lag = report["event_loop_lag_ms"]
+    print(f"event-loop lag: mean {lag['mean']:.2f} ms, p99 {lag['p99']:.2f} ms, max {lag['max']:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="simulated students")
+    parser.add_argument("--concurrency", type=int, default=25, help="students active at once")
+    parser.add_argument("--polls", type=int, default=5, help="/auth/user polls per student")
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--unique-inputs", action="store_true", help="give every student a distinct input so analyses miss the caches")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
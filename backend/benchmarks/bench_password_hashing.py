@@ -0,0 +1,69 @@
+"""
+Login throughput benchmark for bcrypt password verification.
+
+Compares verifying on the event loop (the old behaviour) with the bcrypt worker pool,
+and reports how long the event loop stalls while logins are in flight.
+
+    cd backend && python benchmarks/bench_password_hashing.py --logins 64 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.simple_auth_service import SimpleAuthService
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst delay seen between scheduled wake-ups of the event loop"""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - start - interval)
+    return worst
+
+async def run(mode: str, auth: SimpleAuthService, hashed: str, logins: int):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    
+    async def login():
+        if mode == "inline":
+            auth.verify_password("correct horse", hashed)
+            await asyncio.sleep(0)
+        else:
+            await auth.verify_password_async("correct horse", hashed)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    
+    stop.set()
+    worst_lag = await lag_task
+    return elapsed, worst_lag
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=int(os.environ.get("BCRYPT_ROUNDS", "12")))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+    
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["AUTH_HASH_WORKERS"] = str(args.workers)
+    auth = SimpleAuthService(db=None)
+    hashed = auth.hash_password("correct horse")
+    
+    print(f"bcrypt cost {args.rounds}, {args.logins} logins, {args.workers} hash workers, {os.cpu_count()} cores")
+    for mode in ("inline", "pool"):
+        elapsed, worst_lag = await run(mode, auth, hashed, args.logins)
+        throughput = args.logins / elapsed
+        per_core = throughput / (1 if mode == "inline" else min(args.workers, os.cpu_count() or 1))
+        print(f"{mode:>6}: {throughput:7.1f} logins/s ({per_core:6.1f}/core)  max event-loop stall {worst_lag * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
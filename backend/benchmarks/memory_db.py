@@ -0,0 +1,202 @@
+"""
+In-memory stand-in for the slice of the Motor API the backend uses, so benchmarks can
+run the real app without a MongoDB server. Single-field indexes created through
+create_index are maintained as hash maps and used for equality lookups.
+"""
+import copy
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+def _comparable(value):
+    # Mongo stores naive UTC datetimes; compare everything as aware
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+            continue
+        
+        value = doc.get(field)
+        if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+            for op, arg in condition.items():
+                if op == "$exists":
+                    if (field in doc) != bool(arg):
+                        return False
+                elif op == "$in":
+                    if value not in arg:
+                        return False
+                elif op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    left, right = _comparable(value), _comparable(arg)
+                    if op == "$gt" and not left > right:
+                        return False
+                    if op == "$gte" and not left >= right:
+                        return False
+                    if op == "$lt" and not left < right:
+                        return False
+                    if op == "$lte" and not left <= right:
+                        return False
+                else:
+                    raise NotImplementedError(f"Operator {op} is not supported by MemoryCollection")
+        elif value != condition:
+            return False
+    return True
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {key for key, flag in projection.items() if flag and key != "_id"}
+    if include:
+        projected = {"_id": doc["_id"]} if "_id" in doc else {}
+        for key in include:
+            top = key.split(".", 1)[0]
+            if top in doc:
+                projected[top] = doc[top]
+        doc = projected
+    if projection.get("_id") == 0:
+        doc.pop("_id", None)
+    return doc
+
+class MemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]], projection):
+        self._docs = docs
+        self._projection = projection
+        self._limit = 0
+    
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self._docs.sort(key=lambda d: _comparable(d.get(field)), reverse=direction < 0)
+        return self
+    
+    def limit(self, count: int):
+        self._limit = count
+        return self
+    
+    async def to_list(self, length: Optional[int]):
+        docs = self._docs
+        for cap in (self._limit, length):
+            if cap:
+                docs = docs[:cap]
+        return [_project(doc, self._projection) for doc in docs]
+
+class MemoryCollection:
+    def __init__(self):
+        self._docs: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
+        self._index_info: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)]}}
+        self.operations = 0
+    
+    def _candidates(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        for field, condition in query.items():
+            if field in self._indexes and not isinstance(condition, dict):
+                return self._indexes[field].get(condition, [])
+        return self._docs
+    
+    def _add(self, doc: Dict[str, Any]):
+        doc.setdefault("_id", ObjectId())
+        self._docs.append(doc)
+        for field, index in self._indexes.items():
+            if field in doc:
+                index.setdefault(doc[field], []).append(doc)
+    
+    def _remove(self, doc: Dict[str, Any]):
+        self._docs.remove(doc)
+        for field, index in self._indexes.items():
+            if field in doc:
+                index[doc[field]].remove(doc)
+    
+    async def create_index(self, keys, name: str = None, **options):
+        if len(keys) == 1:
+            field = keys[0][0]
+            index = self._indexes.setdefault(field, {})
+            index.clear()
+            for doc in self._docs:
+                if field in doc:
+                    index.setdefault(doc[field], []).append(doc)
+        self._index_info[name or "_".join(f"{k}_{d}" for k, d in keys)] = {"key": list(keys), **options}
+        return name
+    
+    async def index_information(self):
+        return copy.deepcopy(self._index_info)
+    
+    async def find_one(self, query: Dict[str, Any], projection=None):
+        self.operations += 1
+        for doc in self._candidates(query):
+            if _matches(doc, query):
+                return _project(doc, projection)
+        return None
+    
+    def find(self, query: Optional[Dict[str, Any]] = None, projection=None) -> MemoryCursor:
+        self.operations += 1
+        query = query or {}
+        return MemoryCursor([doc for doc in self._candidates(query) if _matches(doc, query)], projection)
+    
+    async def insert_one(self, doc: Dict[str, Any]):
+        self.operations += 1
+        stored = copy.deepcopy(doc)
+        self._add(stored)
+        doc["_id"] = stored["_id"]
+    
+    async def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True):
+        self.operations += 1
+        for doc in docs:
+            stored = copy.deepcopy(doc)
+            self._add(stored)
+            doc["_id"] = stored["_id"]
+    
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        self.operations += 1
+        for doc in self._candidates(query):
+            if _matches(doc, query):
+                self._remove(doc)
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                self._add(doc)
+                return
+        if upsert:
+            equality = {k: v for k, v in query.items() if not isinstance(v, dict) and not k.startswith("$")}
+            self._add({**equality, **copy.deepcopy(update.get("$set", {}))})
+    
+    async def delete_one(self, query: Dict[str, Any]):
+        self.operations += 1
+        for doc in self._candidates(query):
+            if _matches(doc, query):
+                self._remove(doc)
+                return
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+    
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return self._collections.setdefault(name, MemoryCollection())
+    
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+    
+    async def command(self, name: str):
+        return {"ok": 1.0}
+    
+    @property
+    def operations(self) -> int:
+        return sum(collection.operations for collection in self._collections.values())
+
+class MemoryClient:
+    """Drop-in for AsyncIOMotorClient(url)"""
+    def __init__(self, *args, **kwargs):
+        self._databases: Dict[str, MemoryDatabase] = {}
+    
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        return self._databases.setdefault(name, MemoryDatabase())
+    
+    def close(self):
+        pass
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
+from datetime import datetime
 import uuid
 
 class PersonaSection(BaseModel):
@@ -51,4 +52,26 @@ class CareerAnalysisRequest(BaseModel):
     userInput: str
 
 class CareerAnalysisResponse(BaseModel):
-    careerPaths: List[CareerPath]
\ No newline at end of file
+    careerPaths: List[CareerPath]
+    # Only in compact responses: fields shared by every career, e.g. apsExplanation
+    shared: Optional[Dict[str, str]] = None
+
+class BatchCareerAnalysisRequest(BaseModel):
+    requests: List[CareerAnalysisRequest]
+
+class AnalysisSummary(BaseModel):
+    id: str
+    input: str
+    careerTitles: List[str]
+    timestamp: datetime
+
+class AnalysisHistoryPage(BaseModel):
+    analyses: List[AnalysisSummary]
+    nextCursor: Optional[str] = None
+
+class AnalysisDetail(BaseModel):
+    id: str
+    input: str
+    timestamp: datetime
+    careerPaths: List[CareerPath]
+    shared: Optional[Dict[str, str]] = None
\ No newline at end of file
@@ -1,21 +1,37 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import json
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
+import time
+import math
 from datetime import datetime
 
 # Import our models and services
-from models.career import CareerAnalysisRequest, CareerAnalysisResponse, CareerPath
+from models.career import CareerAnalysisRequest, CareerAnalysisResponse, BatchCareerAnalysisRequest, CareerPath, AnalysisHistoryPage, AnalysisDetail
 from models.auth import UserRegister, UserLogin, AuthResponse, UserProfile, MentorRequest
-from services.gemini_service import GeminiService
 from services.simple_auth_service import SimpleAuthService
 from services.video_service import VideoService
+from services.lazy_service import LazyService
+from services.model_calls import start_model_call_count, TOTAL_MODEL_CALLS
+from services.metrics import REGISTRY, HTTP_REQUEST_SECONDS, span, start_request_timing, server_timing_header
+from services.analysis_cache import CareerAnalysisCache
+from services.analysis_jobs import AnalysisJobQueue, InMemoryJobStore, MongoJobStore
+from services.db_schema import ensure_indexes
+from services.analysis_history import AnalysisHistoryService
+from services.write_buffer import WriteBehindBuffer
+from services.rate_limiter import RateLimitPolicy
+from services.http_responses import FastJSONResponse, CompressionMiddleware
+from services.etags import make_etag, etag_matches, set_etag, not_modified
+import asyncio
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -25,25 +41,218 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Initialize services
-try:
-    gemini_service = GeminiService()
-    auth_service = SimpleAuthService(db)
-    video_service = VideoService()
-    logger = logging.getLogger(__name__)
-    logger.info("All services initialized successfully")
-except Exception as e:
-    logger = logging.getLogger(__name__)
-    logger.error(f"Failed to initialize services: {str(e)}")
-    gemini_service = None
-    auth_service = None
-    video_service = None
+logger = logging.getLogger(__name__)
+
+# Career profiles are only read by the parallel analysis path, so only render them there
+CAREER_PROFILES_ENABLED = (
+    os.environ.get('CAREER_PROFILES_ENABLED', 'true').lower() == 'true'
+    and os.environ.get('CAREER_ANALYSIS_MODE', 'single').lower() == 'parallel'
+)
+
+def _build_gemini_service():
+    # Deferred so the LLM client stack is only imported when analysis is first needed
+    from services.gemini_service import GeminiService
+    from services.career_profiles import CareerProfileStore
+    
+    # Share cached analyses across workers through Mongo when enabled
+    shared_cache = os.environ.get('CAREER_CACHE_SHARED', 'false').lower() == 'true'
+    analysis_cache = CareerAnalysisCache(collection=db.career_analyses if shared_cache else None)
+    # Popular careers are pre-rendered from what past analyses actually returned
+    profile_store = CareerProfileStore(db.career_analyses) if CAREER_PROFILES_ENABLED else None
+    return GeminiService(cache=analysis_cache, profiles=profile_store)
+
+# Services are built on first use and independently, so a Gemini misconfiguration
+# never takes authentication down with it
+gemini = LazyService("gemini", _build_gemini_service)
+auth = LazyService("auth", lambda: SimpleAuthService(db))
+video = LazyService("video", VideoService)
+
+history_service = AnalysisHistoryService(db)
+
+# Analysis, status and mentor-request inserts are batched off the request path
+write_buffer = WriteBehindBuffer(db)
 
 # Create the main app
 app = FastAPI(title="Questly - Career Discovery API")
 
+# Compress large JSON responses (brotli if installed and accepted, else gzip). Added
+# first so it sits inside the http middlewares below, which re-stream every body
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.environ.get('COMPRESSION_MIN_BYTES', '1024')))
+
+# Per-client token buckets on the endpoints that cost a generation or a bcrypt hash.
+# RATE_LIMIT_SHARED=true also counts requests in Mongo so the limits hold across workers.
+# Behind a proxy or ingress, RATE_LIMIT_TRUST_FORWARDED_FOR=true is required: without it
+# every client has the proxy's IP and shares one set of IP-keyed buckets.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.environ.get('RATE_LIMIT_TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+rate_limit_collection = db.rate_limits if os.environ.get('RATE_LIMIT_SHARED', 'false').lower() == 'true' else None
+analysis_rate_limit = RateLimitPolicy(
+    "analysis",
+    float(os.environ.get('RATE_LIMIT_ANALYSIS_PER_MINUTE', '10')),
+    int(os.environ.get('RATE_LIMIT_ANALYSIS_BURST', '5')),
+    rate_limit_collection
+)
+# Sign-in attempts per (IP, email), plus a looser cap per IP across all emails
+auth_rate_limit = RateLimitPolicy(
+    "auth",
+    float(os.environ.get('RATE_LIMIT_AUTH_PER_MINUTE', '10')),
+    int(os.environ.get('RATE_LIMIT_AUTH_BURST', '5')),
+    rate_limit_collection
+)
+auth_ip_rate_limit = RateLimitPolicy(
+    "auth_ip",
+    float(os.environ.get('RATE_LIMIT_AUTH_IP_PER_MINUTE', '60')),
+    int(os.environ.get('RATE_LIMIT_AUTH_IP_BURST', '30')),
+    rate_limit_collection
+)
+
+# Past these queue depths new work is refused straight away instead of waiting (0 disables)
+LOAD_SHED_MAX_QUEUED_GENERATIONS = int(os.environ.get('LOAD_SHED_MAX_QUEUED_GENERATIONS', '64'))
+LOAD_SHED_MAX_PENDING_HASHES = int(os.environ.get('LOAD_SHED_MAX_PENDING_HASHES', '64'))
+
+def _client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def _retry_after_header(retry_after: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+def _limited_response(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"detail": detail}, headers=_retry_after_header(retry_after))
+
+def _analysis_rate_key(request: Request, user: Optional[dict]) -> str:
+    # Signed-in users get their own bucket; everyone else is limited by IP
+    return f"user:{user['id']}" if user else f"ip:{_client_ip(request)}"
+
+async def _enforce_rate_limit(policy: RateLimitPolicy, key: str, cost: int = 1):
+    """Rate-limit checks made inside handlers, where the cost or key depends on the body"""
+    if not RATE_LIMIT_ENABLED:
+        return
+    retry_after = await policy.acquire(key, cost)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests. Please slow down and try again.",
+            headers=_retry_after_header(retry_after)
+        )
+
+@app.middleware("http")
+async def limit_expensive_requests(request: Request, call_next):
+    """Shed load and rate-limit clients on the analysis and sign-in endpoints"""
+    if request.method != "POST":
+        return await call_next(request)
+    
+    path = request.url.path
+    auth_service = auth.get() if auth.initialized else None
+    if path.startswith("/api/analyze-career"):
+        gemini_service = gemini.get() if gemini.initialized else None
+        if gemini_service and LOAD_SHED_MAX_QUEUED_GENERATIONS and gemini_service.queued_generations >= LOAD_SHED_MAX_QUEUED_GENERATIONS:
+            return _limited_response(503, "Career analysis is busy right now. Please try again shortly.", 5)
+        if path == "/api/analyze-career/batch":
+            # Charged per unique input by the handler once the body is parsed
+            return await call_next(request)
+        policy = analysis_rate_limit
+        user = await auth_service.get_current_user(request) if auth_service else None
+        key = _analysis_rate_key(request, user)
+    elif path in ("/api/auth/login", "/api/auth/register"):
+        if auth_service and LOAD_SHED_MAX_PENDING_HASHES and auth_service.pending_hashes >= LOAD_SHED_MAX_PENDING_HASHES:
+            return _limited_response(503, "Sign-in is busy right now. Please try again shortly.", 2)
+        # The per-email limit is applied by the handlers
+        policy = auth_ip_rate_limit
+        key = f"ip:{_client_ip(request)}"
+    else:
+        return await call_next(request)
+    
+    if RATE_LIMIT_ENABLED:
+        retry_after = await policy.acquire(key)
+        if retry_after:
+            return _limited_response(429, "Too many requests. Please slow down and try again.", retry_after)
+    return await call_next(request)
+
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    """Record request latency by route and expose per-stage timings as Server-Timing"""
+    timings = start_request_timing()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    # Label by route template so ids in paths don't explode the series count
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code
+    )
+    timings.append(("total", elapsed))
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+def _collect_service_metrics():
+    """Counters and gauges read from the services at scrape time"""
+    metrics = [
+        ("questly_model_calls_total", "counter", "Outbound model calls by kind",
+         [({"kind": kind}, count) for kind, count in TOTAL_MODEL_CALLS.items()]),
+        ("questly_write_buffer_documents", "gauge", "Documents waiting in the write-behind buffer",
+         [({}, write_buffer.backlog)]),
+        ("questly_write_buffer_total", "counter", "Write-behind buffer activity",
+         [({"event": event}, count) for event, count in write_buffer.stats.items()]),
+        ("questly_analysis_jobs_queued", "gauge", "Analysis jobs waiting for a worker",
+         [({}, job_queue.depth)]),
+        ("questly_rate_limit_total", "counter", "Rate-limited endpoint requests by policy and outcome",
+         [({"policy": policy.name, "outcome": outcome}, count)
+          for policy in (analysis_rate_limit, auth_rate_limit, auth_ip_rate_limit) for outcome, count in policy.stats.items()]),
+    ]
+    # Only report on services that are already up; scraping shouldn't build them
+    gemini_service = gemini.get() if gemini.initialized else None
+    auth_service = auth.get() if auth.initialized else None
+    if gemini_service:
+        breaker = gemini_service.breaker.snapshot()
+        metrics += [
+            ("questly_analysis_cache_total", "counter", "Career analysis cache lookups by outcome",
+             [({"outcome": outcome}, count) for outcome, count in gemini_service.cache.stats.items()]),
+            ("questly_analysis_singleflight_total", "counter", "Analyses executed vs coalesced onto an in-flight generation",
+             [({"outcome": outcome}, count) for outcome, count in gemini_service.inflight.stats.items()]),
+            ("questly_semantic_cache_total", "counter", "Near-duplicate analysis lookups by outcome",
+             [({"outcome": outcome}, count) for outcome, count in
+              (gemini_service.semantic_index.stats.items() if gemini_service.semantic_index else [])]),
+            ("questly_career_profiles", "gauge", "Pre-rendered popular career profiles",
+             [({}, len(gemini_service.profiles) if gemini_service.profiles else 0)]),
+            ("questly_career_profiles_total", "counter", "Career profile lookups and renders by outcome",
+             [({"outcome": outcome}, count) for outcome, count in
+              (gemini_service.profiles.stats.items() if gemini_service.profiles else [])]),
+            ("questly_llm_careers_parsed_total", "counter", "Careers parsed from model output by outcome",
+             [({"outcome": outcome}, count) for outcome, count in gemini_service.parse_stats.careers.items()]),
+            ("questly_llm_output_repairs_total", "counter", "Repairs made to model output by field",
+             [({"field": field, "repair": repair}, count) for (field, repair), count in gemini_service.parse_stats.repairs.items()]),
+            ("questly_generations_queued", "gauge", "Generations waiting for a concurrency slot",
+             [({}, gemini_service.queued_generations)]),
+            ("questly_llm_circuit_open", "gauge", "1 when the LLM circuit breaker is rejecting calls",
+             [({}, 0 if breaker["state"] == "closed" else 1)]),
+            ("questly_llm_circuit_rejected_total", "counter", "Calls rejected by the LLM circuit breaker",
+             [({}, breaker["rejected"])]),
+        ]
+    if auth_service:
+        metrics.append(("questly_password_hashes_pending", "gauge", "Password hashes queued or running",
+                        [({}, auth_service.pending_hashes)]))
+        metrics.append(("questly_session_cache_total", "counter", "Session cache lookups by outcome",
+                        [({"outcome": outcome}, count) for outcome, count in auth_service.session_cache.stats.items()]))
+    return metrics
+
+REGISTRY.register_collector(_collect_service_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus-style metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# Career payloads are large; encode them with orjson where available
+api_router = APIRouter(prefix="/api", default_response_class=FastJSONResponse)
 
 # Define Models for existing endpoints
 class StatusCheck(BaseModel):
@@ -63,7 +272,7 @@ async def root():
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await write_buffer.add("status_checks", status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
@@ -71,13 +280,51 @@ async def get_status_checks():
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+@api_router.get("/ready")
+async def readiness():
+    """
+    Readiness probe: builds any services not yet initialized and pings MongoDB.
+    Returns 503 only when authentication or the database is unavailable; a broken
+    analysis service is reported but doesn't take the worker out of rotation.
+    """
+    for service in (auth, video, gemini):
+        await asyncio.to_thread(service.get)
+    
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=2)
+        database = {"status": "ready"}
+    except Exception as e:
+        database = {"status": "failed", "error": str(e) or e.__class__.__name__}
+    
+    report = {
+        "database": database,
+        "services": {service.name: service.status() for service in (auth, video, gemini)}
+    }
+    ready = database["status"] == "ready" and auth.initialized
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, **report})
+
+# Result of the startup index bootstrap (None until it has finished)
+index_report = None
+
+@api_router.get("/status/indexes")
+async def get_index_status():
+    """Report the indexes ensured at startup and what each collection currently has"""
+    if index_report is None:
+        return {"status": "pending"}
+    return {"status": "failed" if index_report["failed"] else "ok", **index_report}
+
 # Simple Authentication Routes
+def _auth_rate_key(request: Request, email: str) -> str:
+    return f"ip:{_client_ip(request)}|email:{email.strip().lower()}"
+
 @api_router.post("/auth/register", response_model=AuthResponse)
-async def register_user(request: UserRegister, response: Response):
+async def register_user(request: UserRegister, response: Response, http_request: Request):
     """Register a new user"""
+    auth_service = await auth.get_async()
     if not auth_service:
         raise HTTPException(status_code=503, detail="Authentication service unavailable")
     
+    await _enforce_rate_limit(auth_rate_limit, _auth_rate_key(http_request, request.email))
     auth_data = await auth_service.register_user(request.email, request.password, request.name)
     auth_service.set_session_cookie(response, auth_data["session_token"])
     
@@ -87,11 +334,13 @@ async def register_user(request: UserRegister, response: Response):
     )
 
 @api_router.post("/auth/login", response_model=AuthResponse)
-async def login_user(request: UserLogin, response: Response):
+async def login_user(request: UserLogin, response: Response, http_request: Request):
     """Login user with email and password"""
+    auth_service = await auth.get_async()
     if not auth_service:
         raise HTTPException(status_code=503, detail="Authentication service unavailable")
     
+    await _enforce_rate_limit(auth_rate_limit, _auth_rate_key(http_request, request.email))
     auth_data = await auth_service.login_user(request.email, request.password)
     auth_service.set_session_cookie(response, auth_data["session_token"])
     
@@ -101,12 +350,17 @@ async def login_user(request: UserLogin, response: Response):
     )
 
 @api_router.get("/auth/user", response_model=Optional[UserProfile])
-async def get_current_user(request: Request):
-    """Get current authenticated user"""
+async def get_current_user(request: Request, response: Response):
+    """Get current authenticated user; polls with a matching If-None-Match get a 304"""
+    auth_service = await auth.get_async()
     if not auth_service:
         return None
     
     user = await auth_service.get_current_user(request)
+    etag = make_etag("user", json.dumps(user, sort_keys=True, default=str))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     if user:
         return UserProfile(**user)
     return None
@@ -114,18 +368,155 @@ async def get_current_user(request: Request):
 @api_router.post("/auth/logout")
 async def logout_user(request: Request, response: Response):
     """Logout current user"""
+    auth_service = await auth.get_async()
     if not auth_service:
         raise HTTPException(status_code=503, detail="Authentication service unavailable")
     
     success = await auth_service.logout_user(request, response)
     return {"success": success}
 
+async def _run_career_analysis(user_input: str, user_id: Optional[str]) -> List[CareerPath]:
+    """
+    Generate, enrich and (for signed-in users) save career paths for one input
+    """
+    gemini_service = await gemini.get_async()
+    
+    # Generate career paths using Gemini (awaited so other requests keep flowing)
+    career_paths_data = await gemini_service.analyze_career_interests_async(user_input)
+    return await _complete_career_analysis(user_input, user_id, career_paths_data)
+
+async def _complete_career_analysis(user_input: str, user_id: Optional[str], career_paths_data: List[dict]) -> List[CareerPath]:
+    """
+    Add videos to generated careers, convert them to CareerPath and save them for signed-in users
+    """
+    video_service = await video.get_async()
+    
+    # Add video content to each career
+    with span("video_lookup"):
+        for career_data in career_paths_data:
+            if video_service:
+                career_data['videoUrl'] = video_service.generate_career_video(career_data['title'])
+    
+    # Convert to Pydantic models
+    with span("model_conversion"):
+        career_paths = []
+        for career_data in career_paths_data:
+            career_path = CareerPath(**career_data)
+            career_paths.append(career_path)
+    
+    # Save analysis to user profile if authenticated
+    if user_id and career_paths:
+        with span("db_insert"):
+            analysis_doc = {
+                "user_id": user_id,
+                "input": user_input,
+                "results": [cp.dict() for cp in career_paths],
+                "timestamp": datetime.utcnow()
+            }
+            await write_buffer.add("career_analyses", analysis_doc)
+    
+    return career_paths
+
+async def _run_analysis_job(job: dict) -> dict:
+    """Job queue handler: run one queued analysis and return the response payload"""
+    career_paths = await _run_career_analysis(job["input"], job.get("user_id"))
+    return CareerAnalysisResponse(careerPaths=career_paths).dict()
+
+# Background analysis jobs, capped at ANALYSIS_JOB_WORKERS concurrent analyses
+job_store = InMemoryJobStore() if os.environ.get('ANALYSIS_JOB_STORE', 'mongo').lower() == 'memory' else MongoJobStore(db.analysis_jobs)
+job_queue = AnalysisJobQueue(
+    job_store,
+    _run_analysis_job,
+    workers=int(os.environ.get('ANALYSIS_JOB_WORKERS', '4')),
+    max_pending=int(os.environ.get('ANALYSIS_JOB_MAX_PENDING', '1000')),
+    lease_seconds=float(os.environ.get('ANALYSIS_JOB_LEASE_SECONDS', '120')),
+    ttl_seconds=float(os.environ.get('ANALYSIS_JOB_TTL_SECONDS', '86400'))
+)
+
+def _job_status(job: dict) -> dict:
+    """Public view of a job record"""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "result": job.get("result"),
+        "error": job.get("error")
+    }
+
+# Analysis history endpoints
+@api_router.get("/me/analyses", response_model=AnalysisHistoryPage)
+async def list_my_analyses(http_request: Request, response: Response, cursor: Optional[str] = None, limit: int = 20):
+    """List the current user's saved analyses, newest first; pass nextCursor back as cursor for the next page"""
+    auth_service = await auth.get_async()
+    user = await auth_service.get_current_user(http_request) if auth_service else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    # The page only changes when a new analysis is saved, which moves the history version
+    etag = make_etag("history", user["id"], await history_service.history_version(user["id"]), cursor, limit)
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    try:
+        return await history_service.list_for_user(user["id"], cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@api_router.get("/me/analyses/{analysis_id}", response_model=AnalysisDetail)
+async def get_my_analysis(analysis_id: str, http_request: Request, response: Response, compact: bool = False):
+    """Get one saved analysis with its full career paths (?compact=true for the compact shape)"""
+    auth_service = await auth.get_async()
+    user = await auth_service.get_current_user(http_request) if auth_service else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    # Saved analyses never change, so a matching tag needs no database read at all
+    etag = make_etag("analysis", user["id"], analysis_id, compact)
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    
+    analysis = await history_service.get_for_user(user["id"], analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if compact:
+        compact_response = FastJSONResponse(content=jsonable_encoder(_compact_career_content(analysis)))
+        set_etag(compact_response, etag)
+        return compact_response
+    set_etag(response, etag)
+    return analysis
+
+# Career fields that carry the same static block on every career
+COMPACT_SHARED_FIELDS = ("apsExplanation",)
+
+def _compact_career_content(content: dict) -> dict:
+    """
+    Compact response shape: empty fields are dropped, and blocks every career shares are
+    sent once under "shared" instead of being repeated per career
+    """
+    careers = [{key: value for key, value in career.items() if value is not None} for career in content["careerPaths"]]
+    shared = {}
+    for field in COMPACT_SHARED_FIELDS:
+        values = [career.get(field) for career in careers]
+        if values and values[0] is not None and all(value == values[0] for value in values):
+            shared[field] = values[0]
+            for career in careers:
+                del career[field]
+    return {**content, "careerPaths": careers, "shared": shared}
+
 # Career Analysis endpoint (enhanced)
 @api_router.post("/analyze-career", response_model=CareerAnalysisResponse)
-async def analyze_career(request: CareerAnalysisRequest, http_request: Request):
+async def analyze_career(request: CareerAnalysisRequest, http_request: Request, background: bool = False, compact: bool = False):
     """
-    Analyze user interests and generate personalized career paths using Gemini AI
+    Analyze user interests and generate personalized career paths using Gemini AI.
+    With ?background=true the analysis is queued and a job id is returned immediately (202).
+    With ?compact=true shared blocks such as the APS explanation are sent once.
     """
+    gemini_service = await gemini.get_async()
+    auth_service = await auth.get_async()
+    model_calls = start_model_call_count()
+
     try:
         if not gemini_service:
             raise HTTPException(status_code=503, detail="Career analysis service is currently unavailable")
@@ -138,31 +529,26 @@ async def analyze_career(request: CareerAnalysisRequest, http_request: Request):
         if auth_service:
             user = await auth_service.get_current_user(http_request)
         
-        # Generate career paths using Gemini
-        career_paths_data = gemini_service.analyze_career_interests(request.userInput)
+        if background:
+            try:
+                job = await job_queue.submit({"input": request.userInput, "user_id": user["id"] if user else None})
+            except asyncio.QueueFull:
+                raise HTTPException(status_code=503, detail="Too many analyses in progress. Please try again shortly.", headers={"Retry-After": "5"})
+            return FastJSONResponse(status_code=202, content={
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "status_url": f"/api/analyze-career/jobs/{job['job_id']}"
+            })
         
-        # Add video content to each career
-        for career_data in career_paths_data:
-            if video_service:
-                career_data['videoUrl'] = video_service.generate_career_video(career_data['title'])
+        career_paths = await _run_career_analysis(request.userInput, user["id"] if user else None)
         
-        # Convert to Pydantic models
-        career_paths = []
-        for career_data in career_paths_data:
-            career_path = CareerPath(**career_data)
-            career_paths.append(career_path)
-        
-        # Save analysis to user profile if authenticated
-        if user and career_paths:
-            analysis_doc = {
-                "user_id": user["id"],
-                "input": request.userInput,
-                "results": [cp.dict() for cp in career_paths],
-                "timestamp": datetime.utcnow()
-            }
-            await db.career_analyses.insert_one(analysis_doc)
-        
-        return CareerAnalysisResponse(careerPaths=career_paths)
+        logger.info(f"Career analysis made {model_calls.count} model call(s): {model_calls.by_kind}")
+        # Returned directly so the payload is encoded once rather than re-validated first
+        content = {"careerPaths": [cp.dict() for cp in career_paths]}
+        return FastJSONResponse(
+            content=_compact_career_content(content) if compact else content,
+            headers={"X-Model-Calls": str(model_calls.count)}
+        )
         
     except HTTPException:
         raise
@@ -170,6 +556,152 @@ async def analyze_career(request: CareerAnalysisRequest, http_request: Request):
         logger.error(f"Error in career analysis: {str(e)}")
         raise HTTPException(status_code=500, detail="An error occurred while analyzing your career interests. Please try again.")
 
+BATCH_ANALYSIS_MAX_INPUTS = int(os.environ.get('BATCH_ANALYSIS_MAX_INPUTS', '100'))
+
+@api_router.post("/analyze-career/batch")
+async def analyze_career_batch(request: BatchCareerAnalysisRequest, http_request: Request):
+    """
+    Analyze many students' inputs in one request, e.g. a whole class.
+    Streams NDJSON: one {"index", "careerPaths"} (or {"index", "error"}) line per input
+    as it finishes, in completion order, then a final {"done": true, ...} line.
+    """
+    gemini_service = await gemini.get_async()
+    auth_service = await auth.get_async()
+    if not gemini_service:
+        raise HTTPException(status_code=503, detail="Career analysis service is currently unavailable")
+    
+    if not request.requests:
+        raise HTTPException(status_code=400, detail="Please provide at least one input")
+    if len(request.requests) > BATCH_ANALYSIS_MAX_INPUTS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_ANALYSIS_MAX_INPUTS} inputs")
+    
+    # Get current user (optional)
+    user = None
+    if auth_service:
+        user = await auth_service.get_current_user(http_request)
+    
+    # Inputs that share an analysis key (e.g. differ only in case or punctuation) are
+    # analyzed once and answered for every index that asked
+    indexes_by_key = {}
+    inputs = []
+    invalid = []
+    for index, item in enumerate(request.requests):
+        if not item.userInput or len(item.userInput.strip()) < 5:
+            invalid.append(index)
+            continue
+        key = gemini_service.analysis_key(item.userInput)
+        if key not in indexes_by_key:
+            indexes_by_key[key] = []
+            inputs.append(item.userInput)
+        indexes_by_key[key].append(index)
+    
+    # One rate-limit token per analysis the batch asks for
+    if indexes_by_key:
+        await _enforce_rate_limit(analysis_rate_limit, _analysis_rate_key(http_request, user), cost=len(indexes_by_key))
+    
+    async def ndjson_stream():
+        model_calls = start_model_call_count()
+        for index in invalid:
+            yield json.dumps({"index": index, "error": "Please provide more detailed information about your interests"}) + "\n"
+        
+        answered = set()
+        try:
+            async for key, user_input, career_paths_data in gemini_service.analyze_career_interests_batch(inputs):
+                career_paths = await _complete_career_analysis(user_input, user["id"] if user else None, career_paths_data)
+                payload = [cp.dict() for cp in career_paths]
+                for index in indexes_by_key[key]:
+                    yield json.dumps({"index": index, "careerPaths": payload}, default=str) + "\n"
+                answered.add(key)
+        except Exception as e:
+            logger.error(f"Error in batch career analysis: {str(e)}")
+            for key, indexes in indexes_by_key.items():
+                if key not in answered:
+                    for index in indexes:
+                        yield json.dumps({"index": index, "error": "An error occurred while analyzing these career interests. Please try again."}) + "\n"
+        
+        logger.info(f"Batch analysis of {len(request.requests)} input(s) made {model_calls.count} model call(s)")
+        yield json.dumps({
+            "done": True,
+            "total": len(request.requests),
+            "unique": len(indexes_by_key),
+            "modelCalls": model_calls.count
+        }) + "\n"
+    
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@api_router.get("/analyze-career/jobs/{job_id}")
+async def get_analysis_job(job_id: str, http_request: Request):
+    """Get the status, and once completed the result, of a queued career analysis"""
+    auth_service = await auth.get_async()
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    
+    # Jobs submitted by a signed-in user are only visible to that user
+    if job.get("user_id"):
+        user = await auth_service.get_current_user(http_request) if auth_service else None
+        if not user or user["id"] != job["user_id"]:
+            raise HTTPException(status_code=404, detail="Analysis job not found")
+    
+    return FastJSONResponse(content=jsonable_encoder(_job_status(job)))
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@api_router.post("/analyze-career/stream")
+async def analyze_career_stream(request: CareerAnalysisRequest, http_request: Request):
+    """
+    Stream personalized career paths as Server-Sent Events, one "career" event per path
+    as soon as it is generated, followed by a "done" event
+    """
+    gemini_service = await gemini.get_async()
+    auth_service = await auth.get_async()
+    video_service = await video.get_async()
+    if not gemini_service:
+        raise HTTPException(status_code=503, detail="Career analysis service is currently unavailable")
+    
+    if not request.userInput or len(request.userInput.strip()) < 5:
+        raise HTTPException(status_code=400, detail="Please provide more detailed information about your interests")
+    
+    # Get current user (optional)
+    user = None
+    if auth_service:
+        user = await auth_service.get_current_user(http_request)
+    
+    async def event_stream():
+        career_paths = []
+        try:
+            async for career_data in gemini_service.stream_career_analysis(request.userInput):
+                if video_service:
+                    career_data['videoUrl'] = video_service.generate_career_video(career_data['title'])
+                
+                career_path = CareerPath(**career_data)
+                career_paths.append(career_path)
+                yield _sse_event("career", career_path.dict())
+            
+            # Save analysis to user profile if authenticated
+            if user and career_paths:
+                analysis_doc = {
+                    "user_id": user["id"],
+                    "input": request.userInput,
+                    "results": [cp.dict() for cp in career_paths],
+                    "timestamp": datetime.utcnow()
+                }
+                await write_buffer.add("career_analyses", analysis_doc)
+            
+            yield _sse_event("done", {"count": len(career_paths)})
+            
+        except Exception as e:
+            logger.error(f"Error in streaming career analysis: {str(e)}")
+            yield _sse_event("error", {"detail": "An error occurred while analyzing your career interests. Please try again."})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Mentor matching endpoint
 @api_router.post("/request-mentor")
 async def request_mentor(request: MentorRequest):
@@ -185,7 +717,7 @@ async def request_mentor(request: MentorRequest):
             "created_at": datetime.utcnow()
         }
         
-        await db.mentor_requests.insert_one(mentor_doc)
+        await write_buffer.add("mentor_requests", mentor_doc)
         
         return {
             "success": True,
@@ -213,6 +745,57 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+async def bootstrap_indexes():
+    global index_report
+    try:
+        index_report = await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {str(e)}")
+        index_report = {"created": [], "failed": [{"index": "*", "error": str(e)}], "collections": {}}
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+async def warm_services():
+    # Build services off the event loop once the worker is already accepting traffic
+    for service in (auth, video, gemini):
+        await asyncio.to_thread(service.get)
+
+@app.on_event("startup")
+async def start_service_warmup():
+    app.state.service_warmup = asyncio.create_task(warm_services())
+
+@app.on_event("startup")
+async def start_write_buffer():
+    write_buffer.start()
+
+@app.on_event("startup")
+async def start_index_bootstrap():
+    # Runs in the background so an unreachable database doesn't hold up startup
+    app.state.index_bootstrap = asyncio.create_task(bootstrap_indexes())
+
+async def refresh_career_profiles():
+    # Waits for the analysis service, then keeps popular career profiles fresh
+    while True:
+        gemini_service = await gemini.get_async()
+        if gemini_service is not None:
+            break
+        await asyncio.sleep(gemini.retry_seconds)
+    if gemini_service.profiles is not None:
+        await gemini_service.profiles.run(gemini_service.render_career_profile)
+
+@app.on_event("startup")
+async def start_profile_refresh():
+    if CAREER_PROFILES_ENABLED:
+        app.state.profile_refresh = asyncio.create_task(refresh_career_profiles())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    profile_refresh = getattr(app.state, "profile_refresh", None)
+    if profile_refresh is not None:
+        profile_refresh.cancel()
+    await job_queue.stop()
+    # Write out anything still buffered before the connection goes away
+    await write_buffer.stop()
     client.close()
\ No newline at end of file
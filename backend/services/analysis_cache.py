@@ -0,0 +1,93 @@
+import os
+import re
+import copy
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalize_user_input(user_input: str) -> str:
+    """Fold case, punctuation and whitespace so near-identical inputs share a key"""
+    text = re.sub(r"[^\w\s]", " ", user_input.lower())
+    return " ".join(text.split())
+
+def make_cache_key(user_input: str, prompt_version: str, model_name: str) -> str:
+    """Content-addressed key for an analysis: normalized input + prompt and model version"""
+    payload = f"{prompt_version}\x00{model_name}\x00{normalize_user_input(user_input)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CareerAnalysisCache:
+    """
+    Two-tier cache of enriched career analysis results.
+
+    The local tier is an in-process LRU with per-entry expiry. The optional shared tier
+    stores one document per cache key in a MongoDB collection so every worker benefits
+    from a generation made by any other.
+    """
+    def __init__(self, collection=None, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else int(os.environ.get('CAREER_CACHE_TTL_SECONDS', '86400'))
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get('CAREER_CACHE_MAX_ENTRIES', '1024'))
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0}
+    
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached careers for key, or None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, careers = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["local_hits"] += 1
+                return copy.deepcopy(careers)
+            del self._entries[key]
+        
+        if self.collection is not None:
+            try:
+                cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+                doc = await self.collection.find_one(
+                    {"cache_key": key, "timestamp": {"$gt": cutoff}},
+                    {"_id": 0, "results": 1}
+                )
+                if doc and doc.get("results"):
+                    self.stats["shared_hits"] += 1
+                    self._store_local(key, doc["results"])
+                    return copy.deepcopy(doc["results"])
+            except Exception as e:
+                logger.error(f"Shared analysis cache lookup failed: {str(e)}")
+        
+        self.stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, careers: List[Dict[str, Any]], user_input: str = ""):
+        """Store careers under key in both tiers"""
+        self._store_local(key, copy.deepcopy(careers))
+        
+        if self.collection is not None:
+            try:
+                now = datetime.now(timezone.utc)
+                await self.collection.update_one(
+                    {"cache_key": key},
+                    {"$set": {
+                        "cache_key": key,
+                        "input": user_input,
+                        "results": careers,
+                        "timestamp": now,
+                        # Mongo deletes the entry once it is past the TTL reads already ignore
+                        "expires_at": now + timedelta(seconds=self.ttl_seconds)
+                    }},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.error(f"Shared analysis cache write failed: {str(e)}")
+    
+    def _store_local(self, key: str, careers: List[Dict[str, Any]]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, careers)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
@@ -0,0 +1,99 @@
+import base64
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+logger = logging.getLogger(__name__)
+
+# Only what a history list needs; full results are fetched per analysis
+SUMMARY_PROJECTION = {"input": 1, "timestamp": 1, "results.title": 1}
+
+def encode_cursor(timestamp: datetime, object_id: ObjectId) -> str:
+    raw = f"{timestamp.isoformat()}|{object_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_cursor; raises ValueError for anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, object_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except (ValueError, InvalidId, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+class AnalysisHistoryService:
+    """
+    Read path for a user's saved career analyses.
+
+    Pages are walked newest first with a (timestamp, _id) keyset cursor, so every page is
+    an index range scan on career_analyses(user_id, timestamp, _id) however deep it is.
+    """
+    def __init__(self, db, max_page_size: int = 100):
+        self.db = db
+        self.max_page_size = max_page_size
+    
+    async def list_for_user(self, user_id: str, cursor: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        limit = max(1, min(limit, self.max_page_size))
+        query: Dict[str, Any] = {"user_id": user_id}
+        if cursor:
+            timestamp, object_id = decode_cursor(cursor)
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": object_id}}
+            ]
+        
+        docs = await (
+            self.db.career_analyses.find(query, SUMMARY_PROJECTION)
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(limit + 1)
+            .to_list(limit + 1)
+        )
+        
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["timestamp"], docs[-1]["_id"])
+        
+        return {
+            "analyses": [
+                {
+                    "id": str(doc["_id"]),
+                    "input": doc.get("input", ""),
+                    "careerTitles": [result.get("title", "") for result in doc.get("results", [])],
+                    "timestamp": doc["timestamp"]
+                }
+                for doc in docs
+            ],
+            "nextCursor": next_cursor
+        }
+    
+    async def history_version(self, user_id: str) -> str:
+        """
+        Changes whenever a new analysis is saved for the user; analyses are insert-only,
+        so the newest one's id identifies the whole history. Served from the index alone.
+        """
+        docs = await (
+            self.db.career_analyses.find({"user_id": user_id}, {"_id": 1})
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(1)
+            .to_list(1)
+        )
+        return str(docs[0]["_id"]) if docs else "empty"
+    
+    async def get_for_user(self, user_id: str, analysis_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            object_id = ObjectId(analysis_id)
+        except InvalidId:
+            return None
+        
+        doc = await self.db.career_analyses.find_one({"_id": object_id, "user_id": user_id})
+        if not doc:
+            return None
+        return {
+            "id": str(doc["_id"]),
+            "input": doc.get("input", ""),
+            "timestamp": doc["timestamp"],
+            "careerPaths": doc.get("results", [])
+        }
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import secrets
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+def _as_utc(value: datetime) -> datetime:
+    """Mongo hands back naive UTC datetimes; make them comparable with aware ones"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+class InMemoryJobStore:
+    """Job store for tests and single-worker deployments; keeps the most recent jobs only"""
+    def __init__(self, max_jobs: int = 10000):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    async def create(self, job: Dict[str, Any]):
+        self._jobs[job["job_id"]] = dict(job)
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+    
+    async def update(self, job_id: str, fields: Dict[str, Any]):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields)
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+    
+    async def claim(self, job_id: str, owner: str, lease_expires_at: datetime, now: datetime) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if not job or not self._claimable(job, now):
+            return None
+        job.update({"status": JOB_RUNNING, "owner": owner, "lease_expires_at": lease_expires_at, "updated_at": now})
+        return dict(job)
+    
+    async def stale(self, pending_before: datetime, now: datetime) -> List[Dict[str, Any]]:
+        return [
+            dict(job) for job in self._jobs.values()
+            if (job["status"] == JOB_PENDING and _as_utc(job["updated_at"]) < pending_before)
+            or (job["status"] == JOB_RUNNING and self._claimable(job, now))
+        ]
+    
+    @staticmethod
+    def _claimable(job: Dict[str, Any], now: datetime) -> bool:
+        if job["status"] == JOB_PENDING:
+            return True
+        lease = job.get("lease_expires_at")
+        return job["status"] == JOB_RUNNING and (lease is None or _as_utc(lease) < now)
+
+class MongoJobStore:
+    """Job store backed by a MongoDB collection so job state survives restarts"""
+    def __init__(self, collection):
+        self.collection = collection
+    
+    async def create(self, job: Dict[str, Any]):
+        await self.collection.insert_one(dict(job))
+    
+    async def update(self, job_id: str, fields: Dict[str, Any]):
+        await self.collection.update_one({"job_id": job_id}, {"$set": fields})
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+    
+    async def claim(self, job_id: str, owner: str, lease_expires_at: datetime, now: datetime) -> Optional[Dict[str, Any]]:
+        # Atomic, so exactly one worker across all processes wins each job
+        return await self.collection.find_one_and_update(
+            {"job_id": job_id, "$or": [
+                {"status": JOB_PENDING},
+                {"status": JOB_RUNNING, "lease_expires_at": {"$not": {"$gte": now}}}
+            ]},
+            {"$set": {"status": JOB_RUNNING, "owner": owner, "lease_expires_at": lease_expires_at, "updated_at": now}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def stale(self, pending_before: datetime, now: datetime) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"$or": [
+            {"status": JOB_PENDING, "updated_at": {"$lt": pending_before}},
+            {"status": JOB_RUNNING, "lease_expires_at": {"$not": {"$gte": now}}}
+        ]}, {"_id": 0, "job_id": 1})
+        return await cursor.to_list(None)
+
+class AnalysisJobQueue:
+    """
+    Bounded pool of asyncio workers that run queued career analyses.
+
+    submit() records a pending job and returns its id straight away. A fixed number of
+    workers pull jobs off the queue, so bursts wait in line instead of all hitting Gemini
+    at once. A worker claims a job atomically in the store, with a lease, before running
+    it, so with several processes each job runs once. A periodic sweep picks up jobs
+    whose lease ran out (their process died) or that sat pending too long. Finished jobs
+    get an expires_at so the store can drop them after ttl_seconds.
+    """
+    def __init__(self, store, handler: Callable[[Dict[str, Any]], Awaitable[Any]], workers: int = 4, max_pending: int = 1000,
+                 lease_seconds: float = 120, ttl_seconds: float = 86400):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        # Should exceed the longest analysis, or a slow job may be claimed a second time
+        self.lease_seconds = lease_seconds
+        self.ttl_seconds = ttl_seconds
+        self.owner = secrets.token_hex(8)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+    
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+    
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        # Recover in the background so a slow store never delays startup
+        self._tasks.append(asyncio.create_task(self._recover_stale()))
+    
+    async def _recover_stale(self):
+        while True:
+            try:
+                now = datetime.now(timezone.utc)
+                stale = await self.store.stale(now - timedelta(seconds=self.lease_seconds), now)
+                for job in stale:
+                    # Workers claim before running, so queueing a job another process also found is harmless
+                    self._queue.put_nowait(job["job_id"])
+            except asyncio.QueueFull:
+                logger.warning("Job queue full while recovering stale jobs")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to recover stale jobs: {str(e)}")
+            await asyncio.sleep(self.lease_seconds)
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job and return its record; raises asyncio.QueueFull when the backlog is full"""
+        if self._queue is None:
+            raise RuntimeError("Job queue has not been started")
+        if self._queue.full():
+            raise asyncio.QueueFull()
+        
+        now = datetime.now(timezone.utc)
+        job = {
+            "job_id": secrets.token_urlsafe(16),
+            "status": JOB_PENDING,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+            **payload
+        }
+        await self.store.create(job)
+        self._queue.put_nowait(job["job_id"])
+        return job
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+    
+    def _finished(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        return {**fields, "updated_at": now, "lease_expires_at": None, "expires_at": now + timedelta(seconds=self.ttl_seconds)}
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                now = datetime.now(timezone.utc)
+                job = await self.store.claim(job_id, self.owner, now + timedelta(seconds=self.lease_seconds), now)
+                if job is None:
+                    # Finished, or running under another worker's lease
+                    continue
+                result = await self.handler(job)
+                await self.store.update(job_id, self._finished({"status": JOB_COMPLETED, "result": result}))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed on worker {worker_id}: {str(e)}")
+                try:
+                    await self.store.update(job_id, self._finished({
+                        "status": JOB_FAILED,
+                        "error": "An error occurred while analyzing your career interests. Please try again."
+                    }))
+                except Exception as store_error:
+                    logger.error(f"Failed to record job failure: {str(store_error)}")
+            finally:
+                self._queue.task_done()
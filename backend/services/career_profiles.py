@@ -0,0 +1,90 @@
+import asyncio
+import copy
+import logging
+import os
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from .sa_data import normalize_career_title
+
+logger = logging.getLogger(__name__)
+
+class CareerProfileStore:
+    """
+    Pre-rendered, enriched CareerPath profiles for the most popular careers.
+
+    A background loop counts career titles across the most recent analyses, renders a
+    generic profile for each of the top CAREER_PROFILE_TOP_N and re-renders them every
+    CAREER_PROFILE_REFRESH_SECONDS. The analysis path assembles careers from these
+    profiles and only asks the model to personalize them.
+    """
+    def __init__(self, collection=None, top_n: Optional[int] = None, refresh_seconds: Optional[float] = None, sample_size: Optional[int] = None):
+        self.collection = collection
+        self.top_n = top_n if top_n is not None else int(os.environ.get('CAREER_PROFILE_TOP_N', '20'))
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(os.environ.get('CAREER_PROFILE_REFRESH_SECONDS', '3600'))
+        self.sample_size = sample_size if sample_size is not None else int(os.environ.get('CAREER_PROFILE_SAMPLE_SIZE', '5000'))
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"hits": 0, "misses": 0, "rendered": 0, "failed": 0}
+    
+    @staticmethod
+    def _key(title: str) -> str:
+        return " ".join(normalize_career_title(title))
+    
+    def __len__(self) -> int:
+        return len(self._profiles)
+    
+    def get(self, title: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the pre-rendered profile for a career title, if there is one"""
+        profile = self._profiles.get(self._key(title))
+        if profile is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return copy.deepcopy(profile)
+    
+    async def popular_titles(self) -> List[str]:
+        """Most frequent career titles in recent analyses, most popular first"""
+        if self.collection is None:
+            return []
+        # Shared analysis-cache entries live in the same collection; only count real analyses
+        docs = await self.collection.find(
+            {"cache_key": {"$exists": False}}, {"results.title": 1, "_id": 0}
+        ).sort([("timestamp", -1)]).limit(self.sample_size).to_list(self.sample_size)
+        
+        counts = Counter()
+        display = {}
+        for doc in docs:
+            for career in doc.get("results") or []:
+                title = str(career.get("title", "")).strip()
+                key = self._key(title)
+                if key:
+                    counts[key] += 1
+                    display.setdefault(key, title)
+        return [display[key] for key, _ in counts.most_common(self.top_n)]
+    
+    async def refresh(self, render: Callable[[str], Awaitable[Dict[str, Any]]]):
+        """Render profiles for the current top careers and swap them in"""
+        titles = await self.popular_titles()
+        profiles = {}
+        for title in titles:
+            try:
+                profiles[self._key(title)] = await render(title)
+                self.stats["rendered"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.warning(f"Could not render career profile for {title}: {str(e)}")
+                # Keep serving the previous profile rather than losing it to a transient failure
+                previous = self._profiles.get(self._key(title))
+                if previous is not None:
+                    profiles[self._key(title)] = previous
+        
+        self._profiles = profiles
+        logger.info(f"Career profiles refreshed: {len(profiles)} of {len(titles)} popular careers")
+    
+    async def run(self, render: Callable[[str], Awaitable[Dict[str, Any]]]):
+        """Refresh forever; meant to run as a background task"""
+        while True:
+            try:
+                await self.refresh(render)
+            except Exception as e:
+                logger.error(f"Error refreshing career profiles: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
@@ -0,0 +1,93 @@
+import uuid
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from models.career import CareerPath
+from .stream_parser import RepairStats
+
+logger = logging.getLogger(__name__)
+
+# Default title for each story section, used when the model sends only the text
+SECTION_TITLES = {
+    "persona": "Meet Your Future Self",
+    "dayInLife": "A Day in Your Life",
+    "weekendQuest": "Your Weekend Quest",
+    "realityCheck": "The Reality Check",
+}
+
+def normalize_career(career: Any, stats: Optional[RepairStats] = None, truncated: bool = False) -> Dict[str, Any]:
+    """
+    Repair the shape of one model-produced career and validate it against CareerPath.
+    Returns the validated career as a dict; raises ValueError (and counts the career as
+    dropped) if it can't be used. Repairs are only counted for careers that are kept.
+    A truncated career (recovered from cut-off output) gets no defaults for missing
+    content: whatever the cut removed makes it fail validation instead.
+    """
+    stats = stats if stats is not None else RepairStats()
+    if not isinstance(career, dict):
+        stats.record("career", "not_an_object")
+        stats.careers["dropped"] += 1
+        raise ValueError("Career is not a JSON object")
+    
+    career = dict(career)
+    repairs: List[Tuple[str, str]] = []
+    if truncated:
+        repairs.append(("career", "truncated"))
+    
+    if not career.get("id"):
+        career["id"] = str(uuid.uuid4())
+        repairs.append(("id", "generated"))
+    elif not isinstance(career["id"], str):
+        career["id"] = str(career["id"])
+        repairs.append(("id", "coerced"))
+    
+    for field, default_title in SECTION_TITLES.items():
+        section = career.get(field)
+        if isinstance(section, str) and section.strip():
+            career[field] = {"title": default_title, "description": section.strip()}
+            repairs.append((field, "wrapped"))
+        elif isinstance(section, dict) and not section.get("title"):
+            career[field] = {**section, "title": default_title}
+            repairs.append((field, "title_defaulted"))
+    
+    skills = career.get("skills")
+    if isinstance(skills, str):
+        career["skills"] = [skill.strip() for skill in skills.split(",") if skill.strip()]
+        repairs.append(("skills", "split"))
+    elif skills is None and not truncated:
+        career["skills"] = []
+        repairs.append(("skills", "defaulted"))
+    elif truncated and skills == []:
+        # Most likely an array the cut closed before its first item
+        del career["skills"]
+    elif isinstance(skills, list) and not all(isinstance(skill, str) for skill in skills):
+        career["skills"] = [str(skill) for skill in skills if skill is not None]
+        repairs.append(("skills", "coerced"))
+    
+    for field in ("timeToMastery", "averageSalary"):
+        value = career.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            career[field] = str(value)
+            repairs.append((field, "coerced"))
+        elif (value is None or value == "") and not truncated:
+            career[field] = "Varies"
+            repairs.append((field, "defaulted"))
+    
+    # Ensure salary is in Rand format
+    if isinstance(career.get("averageSalary"), str) and '$' in career["averageSalary"]:
+        career["averageSalary"] = career["averageSalary"].replace('$', 'R ')
+        repairs.append(("averageSalary", "currency"))
+    
+    try:
+        validated = CareerPath(**career)
+    except ValidationError as e:
+        fields = sorted({str(error["loc"][0]) if error["loc"] else "career" for error in e.errors()})
+        for field in fields:
+            stats.record(field, "invalid")
+        stats.careers["dropped"] += 1
+        raise ValueError(f"Career failed validation on {', '.join(fields)}") from e
+    
+    for field, repair in repairs:
+        stats.record(field, repair)
+    stats.careers["repaired" if repairs else "clean"] += 1
+    return validated.dict(exclude_none=True)
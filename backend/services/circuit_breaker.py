@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider that is currently failing"""
+
+class GuardedCall:
+    """
+    Handle yielded by CircuitBreaker.guard(). Callers that do other work inside the
+    guarded block (e.g. yielding to a slow client) set latency to the time actually spent
+    waiting on the provider; otherwise the whole block is timed.
+    """
+    __slots__ = ("latency",)
+    
+    def __init__(self):
+        self.latency: Optional[float] = None
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker for calls to an external provider.
+
+    Every call is recorded as (time, ok, latency); calls slower than slow_call_seconds
+    count as failures. When at least min_calls fall inside window_seconds and the failure
+    ratio reaches failure_ratio, the circuit opens and calls are rejected straight away
+    for open_seconds. After that a single probe call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+    def __init__(self, name: str, failure_ratio: Optional[float] = None, min_calls: Optional[int] = None,
+                 window_seconds: Optional[float] = None, open_seconds: Optional[float] = None,
+                 slow_call_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_ratio = failure_ratio if failure_ratio is not None else float(os.environ.get('BREAKER_FAILURE_RATIO', '0.5'))
+        self.min_calls = min_calls if min_calls is not None else int(os.environ.get('BREAKER_MIN_CALLS', '5'))
+        self.window_seconds = window_seconds if window_seconds is not None else float(os.environ.get('BREAKER_WINDOW_SECONDS', '60'))
+        self.open_seconds = open_seconds if open_seconds is not None else float(os.environ.get('BREAKER_OPEN_SECONDS', '30'))
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', '25'))
+        
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+        self.stats = {"rejected": 0, "opened": 0}
+    
+    def check(self):
+        """Raise CircuitOpenError if a call would be rejected right now"""
+        if self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds:
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        if self.state != CLOSED and self._probe_in_flight:
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is half-open and already probing")
+    
+    @asynccontextmanager
+    async def guard(self):
+        """Admit one call (or reject it) and record how it went"""
+        self.check()
+        probing = self.state != CLOSED
+        if probing:
+            self.state = HALF_OPEN
+            self._probe_in_flight = True
+        
+        call = GuardedCall()
+        start = time.monotonic()
+        try:
+            yield call
+        except BaseException as e:
+            # Client cancellations and disconnects say nothing about the provider's health
+            if not isinstance(e, (asyncio.CancelledError, GeneratorExit)):
+                self._record(False, self._latency(call, start), probing)
+            elif probing:
+                self._probe_in_flight = False
+            raise
+        else:
+            latency = self._latency(call, start)
+            self._record(latency < self.slow_call_seconds, latency, probing)
+    
+    @staticmethod
+    def _latency(call: GuardedCall, start: float) -> float:
+        return call.latency if call.latency is not None else time.monotonic() - start
+    
+    async def call(self, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Run fn() under the breaker with an optional deadline"""
+        async with self.guard():
+            return await asyncio.wait_for(fn(), timeout=timeout)
+    
+    def snapshot(self) -> dict:
+        self._trim(time.monotonic())
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        latencies = sorted(latency for _, _, latency in self._calls)
+        return {
+            "state": self.state,
+            "calls_in_window": len(self._calls),
+            "failures_in_window": failures,
+            "p50_latency_seconds": latencies[len(latencies) // 2] if latencies else None,
+            **self.stats
+        }
+    
+    def _record(self, ok: bool, latency: float, probing: bool):
+        now = time.monotonic()
+        self._calls.append((now, ok, latency))
+        self._trim(now)
+        
+        if probing:
+            self._probe_in_flight = False
+            if ok:
+                logger.info(f"{self.name} circuit closed after successful probe")
+                self.state = CLOSED
+                self._calls.clear()
+            else:
+                self._open(now)
+            return
+        
+        if self.state == CLOSED and len(self._calls) >= self.min_calls:
+            failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            if failures / len(self._calls) >= self.failure_ratio:
+                self._open(now)
+    
+    def _open(self, now: float):
+        logger.warning(f"{self.name} circuit opened for {self.open_seconds}s")
+        self.state = OPEN
+        self._opened_at = now
+        self.stats["opened"] += 1
+    
+    def _trim(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
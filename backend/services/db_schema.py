@@ -0,0 +1,65 @@
+import logging
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# (collection, keys, options) for every index the API relies on
+INDEX_SPECS: List[Dict[str, Any]] = [
+    {"collection": "users", "keys": [("email", ASCENDING)], "options": {"name": "email_unique", "unique": True}},
+    {"collection": "users", "keys": [("user_id", ASCENDING)], "options": {"name": "user_id_unique", "unique": True}},
+    {"collection": "sessions", "keys": [("session_token", ASCENDING)], "options": {"name": "session_token_unique", "unique": True}},
+    # Mongo deletes sessions once expires_at has passed
+    {"collection": "sessions", "keys": [("expires_at", ASCENDING)], "options": {"name": "expires_at_ttl", "expireAfterSeconds": 0}},
+    # Serves per-user history pages walked by (timestamp, _id) keyset cursors
+    {"collection": "career_analyses", "keys": [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], "options": {"name": "user_id_timestamp_id"}},
+    # Shared analysis cache entries; per-user history documents have no cache_key
+    {"collection": "career_analyses", "keys": [("cache_key", ASCENDING)], "options": {
+        "name": "cache_key_unique",
+        "unique": True,
+        "partialFilterExpression": {"cache_key": {"$exists": True}}
+    }},
+    # Expired cache entries are deleted; history documents are never touched
+    {"collection": "career_analyses", "keys": [("expires_at", ASCENDING)], "options": {
+        "name": "cache_expires_at_ttl",
+        "expireAfterSeconds": 0,
+        "partialFilterExpression": {"cache_key": {"$exists": True}}
+    }},
+    {"collection": "analysis_jobs", "keys": [("job_id", ASCENDING)], "options": {"name": "job_id_unique", "unique": True}},
+    {"collection": "analysis_jobs", "keys": [("status", ASCENDING)], "options": {"name": "status"}},
+    # Finished jobs are dropped once expires_at has passed; pending and running jobs have none
+    {"collection": "analysis_jobs", "keys": [("expires_at", ASCENDING)], "options": {"name": "expires_at_ttl", "expireAfterSeconds": 0}},
+    # Shared rate-limit windows expire on their own
+    {"collection": "rate_limits", "keys": [("expires_at", ASCENDING)], "options": {"name": "expires_at_ttl", "expireAfterSeconds": 0}},
+]
+
+async def ensure_indexes(db) -> Dict[str, Any]:
+    """
+    Create any missing indexes from INDEX_SPECS and report what each collection has.
+    create_index is idempotent, so this is safe to run on every startup; a failure on one
+    index (e.g. duplicate data blocking a unique index) is reported, not raised.
+    """
+    report: Dict[str, Any] = {"created": [], "failed": [], "collections": {}}
+    
+    for spec in INDEX_SPECS:
+        name = f"{spec['collection']}.{spec['options']['name']}"
+        try:
+            await db[spec["collection"]].create_index(spec["keys"], **spec["options"])
+            report["created"].append(name)
+        except PyMongoError as e:
+            logger.error(f"Failed to create index {name}: {str(e)}")
+            report["failed"].append({"index": name, "error": str(e)})
+    
+    for collection in sorted({spec["collection"] for spec in INDEX_SPECS}):
+        try:
+            info = await db[collection].index_information()
+            report["collections"][collection] = {
+                index_name: {key: value for key, value in details.items() if key in ("key", "unique", "expireAfterSeconds")}
+                for index_name, details in info.items()
+            }
+        except PyMongoError as e:
+            report["collections"][collection] = {"error": str(e)}
+    
+    logger.info(f"Index bootstrap: {len(report['created'])} ensured, {len(report['failed'])} failed")
+    return report
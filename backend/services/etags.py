@@ -0,0 +1,45 @@
+import hashlib
+from fastapi import Request, Response
+
+# Responses are per-user, and clients must revalidate before reusing them
+CACHE_CONTROL = "private, no-cache"
+
+# Content-codings CompressionMiddleware may apply, each with its own ETag suffix
+CONTENT_CODINGS = ("gzip", "br")
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given parts"""
+    payload = "\x00".join(str(part) for part in parts)
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    The strong ETag of a representation sent with a content-coding: strong validators
+    must differ per encoding, so the coding is appended inside the quotes
+    """
+    return f'{etag[:-1]}-{encoding}"'
+
+def _without_encoding(etag: str) -> str:
+    for encoding in CONTENT_CODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True when the request's If-None-Match lists etag in any content-coding
+    (If-None-Match uses weak comparison)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(_without_encoding(tag.removeprefix("W/")) == etag for tag in candidates)
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -1,77 +1,411 @@
-import google.generativeai as genai
+import asyncio
+import contextlib
 import os
-import json
 import logging
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from .sa_data import get_institutions_for_career, get_subjects_for_career, APS_EXPLANATION
+from .image_service import CareerImageService
+from .model_calls import record_model_call
+from .analysis_cache import CareerAnalysisCache, make_cache_key
+from .single_flight import SingleFlight
+from .semantic_cache import SemanticAnalysisIndex
+from .career_profiles import CareerProfileStore
+from .stream_parser import IncrementalCareerParser, RepairStats, repair_json
+from .career_schema import normalize_career
+from .circuit_breaker import CircuitBreaker
+from .llm_providers import LLMProvider, get_llm_provider
+from .metrics import span
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Bump whenever _build_career_analysis_prompt changes so cached analyses are not reused
+PROMPT_VERSION = "sa-careers-v1"
+
+# Stand-in student used when rendering the generic profiles of popular careers
+GENERIC_PROFILE_INPUT = "A South African high school student exploring this career"
+
+# Careers each analysis prompt asks the model for
+CAREERS_PER_ANALYSIS = 2
+
+# Output budget per student in a packed batch generation
+PACKED_TOKENS_PER_STUDENT = 3000
+
 class GeminiService:
-    def __init__(self):
-        # Configure Gemini API
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
+    def __init__(self, cache: Optional[CareerAnalysisCache] = None, provider: Optional[LLMProvider] = None,
+                 profiles: Optional[CareerProfileStore] = None):
+        # Text generation backend: Gemini unless LLM_PROVIDER says otherwise
+        self.provider = provider if provider is not None else get_llm_provider()
+        
+        # Cap on concurrent in-flight generations per worker
+        self.max_concurrency = int(os.environ.get('GEMINI_MAX_CONCURRENCY', '32'))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Callers waiting for a slot; the API sheds analysis requests when this grows too long
+        self.queued_generations = 0
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        # Per-call deadline, and a breaker that fails fast to the fallback during outages
+        self.call_timeout = float(os.environ.get('GEMINI_CALL_TIMEOUT_SECONDS', '30'))
+        self.breaker = CircuitBreaker('gemini')
         
-    def analyze_career_interests(self, user_input: str) -> List[Dict[str, Any]]:
+        self.image_service = CareerImageService()
+        # How often model output needed repairing, per field, and how many careers were dropped
+        self.parse_stats = RepairStats()
+        self.cache = cache if cache is not None else CareerAnalysisCache()
+        # Identical concurrent analyses share a single generation
+        self.inflight = SingleFlight()
+        # Near-duplicate inputs ("I like computers and games" / "gaming and computers")
+        # reuse the cached analysis of their nearest neighbour
+        semantic_enabled = os.environ.get('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+        self.semantic_index = SemanticAnalysisIndex() if semantic_enabled else None
+        
+        # "single" asks for every career in one generation; "parallel" lists titles
+        # first and then generates each career concurrently under a deadline
+        self.analysis_mode = os.environ.get('CAREER_ANALYSIS_MODE', 'single').lower()
+        self.parallel_deadline = float(os.environ.get('CAREER_ANALYSIS_DEADLINE_SECONDS', '20'))
+        
+        # Pre-rendered profiles for popular careers; in parallel mode these replace the
+        # per-career generation, leaving only a short personalization call
+        self.profiles = profiles
+        self.personalize_profiles = os.environ.get('CAREER_PROFILE_PERSONALIZE', 'true').lower() == 'true'
+        
+        # Batch analyses pack up to BATCH_ANALYSIS_PACK_SIZE students into one generation,
+        # as many as fit in the model's output limit, and run at most
+        # BATCH_ANALYSIS_CONCURRENCY generations per batch at once
+        self.batch_pack_size = max(1, min(
+            int(os.environ.get('BATCH_ANALYSIS_PACK_SIZE', '4')),
+            self.provider.max_output_tokens // PACKED_TOKENS_PER_STUDENT
+        ))
+        self.batch_concurrency = max(1, int(os.environ.get('BATCH_ANALYSIS_CONCURRENCY', '4')))
+        
+    async def analyze_career_interests_async(self, user_input: str) -> List[Dict[str, Any]]:
         """
-        Analyze user's interests and generate personalized career paths
+        Analyze user's interests and generate personalized career paths without blocking
+        the event loop. Results are served from the analysis cache when possible,
+        concurrent requests for the same input share one generation, and at most
+        GEMINI_MAX_CONCURRENCY generations run at once.
         """
+        cache_key = make_cache_key(user_input, PROMPT_VERSION, self.provider.model_name)
+        with span("cache_lookup"):
+            cached = await self._get_cached(cache_key, user_input)
+        if cached is not None:
+            return cached
+        
+        async def generate_and_cache():
+            careers, complete = await self._generate_careers_async(user_input)
+            # Careers salvaged from cut-off output are served once, not reused
+            if complete:
+                await self._cache_careers(cache_key, careers, user_input)
+            return careers
+        
         try:
-            prompt = self._build_career_analysis_prompt(user_input)
-            
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.8,
-                    top_p=0.9,
-                    max_output_tokens=6000,
-                )
-            )
-            
-            # Parse the response
-            career_data = self._parse_gemini_response(response.text)
-            
-            # Enhance with SA-specific data
-            enhanced_careers = self._enhance_with_sa_data(career_data)
-            
-            return enhanced_careers
-            
+            return await self.inflight.do(cache_key, generate_and_cache)
         except Exception as e:
             logger.error(f"Error analyzing career interests: {str(e)}")
-            # Return fallback mock data in case of API failure
+            # Fallback careers are never cached
             return self._get_fallback_careers(user_input)
     
-    def generate_career_image(self, career_title: str) -> str:
+    def analysis_key(self, user_input: str) -> str:
+        """Cache key of an input's analysis; inputs with the same key get the same careers"""
+        return make_cache_key(user_input, PROMPT_VERSION, self.provider.model_name)
+    
+    async def analyze_career_interests_batch(self, user_inputs: List[str]) -> AsyncIterator[Tuple[str, str, List[Dict[str, Any]]]]:
+        """
+        Analyze many inputs, yielding (analysis_key, user_input, careers) as each one
+        finishes. Inputs with the same analysis_key are analyzed once and yielded once,
+        cached analyses are yielded straight away, and the rest are packed several
+        students per generation. A student missing from a packed response is analyzed on
+        their own, so every input always gets careers.
+        """
+        unique = {}
+        for user_input in user_inputs:
+            unique.setdefault(self.analysis_key(user_input), user_input)
+        
+        misses = []
+        for cache_key, user_input in unique.items():
+            cached = await self._get_cached(cache_key, user_input)
+            if cached is not None:
+                yield cache_key, user_input, cached
+            else:
+                misses.append((cache_key, user_input))
+        
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def run_pack(pack: List[Tuple[str, str]]) -> List[Tuple[str, str, List[Dict[str, Any]]]]:
+            async with semaphore:
+                return await self._analyze_pack(pack)
+        
+        packs = [misses[i:i + self.batch_pack_size] for i in range(0, len(misses), self.batch_pack_size)]
+        tasks = [asyncio.ensure_future(run_pack(pack)) for pack in packs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result
+        finally:
+            # The client went away mid-batch
+            for task in tasks:
+                task.cancel()
+    
+    async def _analyze_pack(self, pack: List[Tuple[str, str]]) -> List[Tuple[str, str, List[Dict[str, Any]]]]:
+        """
+        Generate careers for several students with one prompt, falling back to
+        individual analyses for any student the packed response doesn't cover
+        """
+        results = []
+        remaining = pack
+        if len(pack) > 1:
+            try:
+                user_inputs = [user_input for _, user_input in pack]
+                response_text = await self._generate_text_async(
+                    self._build_packed_career_analysis_prompt(user_inputs),
+                    max_output_tokens=min(PACKED_TOKENS_PER_STUDENT * len(pack), self.provider.max_output_tokens)
+                )
+                with span("parse"):
+                    packed = self._parse_packed_response(response_text, len(pack))
+                
+                remaining = []
+                for number, (cache_key, user_input) in enumerate(pack, start=1):
+                    if number not in packed:
+                        remaining.append((cache_key, user_input))
+                        continue
+                    career_data, complete = packed[number]
+                    with span("enhance"):
+                        if self.image_service.uses_model:
+                            careers = await asyncio.to_thread(self._enhance_with_sa_data, career_data)
+                        else:
+                            careers = self._enhance_with_sa_data(career_data)
+                    if complete:
+                        await self._cache_careers(cache_key, careers, user_input)
+                    results.append((cache_key, user_input, careers))
+            except Exception as e:
+                logger.warning(f"Packed analysis of {len(pack)} inputs failed, analyzing individually: {str(e)}")
+                done = {cache_key for cache_key, _, _ in results}
+                remaining = [item for item in pack if item[0] not in done]
+        
+        individual = await asyncio.gather(*(self.analyze_career_interests_async(user_input) for _, user_input in remaining))
+        results.extend((cache_key, user_input, careers) for (cache_key, user_input), careers in zip(remaining, individual))
+        return results
+    
+    async def _get_cached(self, cache_key: str, user_input: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Exact cache hit first, then the cached analysis of the most similar past input
+        """
+        cached = await self.cache.get(cache_key)
+        if cached is not None or self.semantic_index is None:
+            return cached
+        
+        match = self.semantic_index.lookup(user_input)
+        if match is None:
+            return None
+        neighbour_key, similarity = match
+        cached = await self.cache.get(neighbour_key)
+        if cached is None:
+            # The neighbour's analysis has expired or been evicted
+            self.semantic_index.remove(neighbour_key)
+            return None
+        logger.info(f"Serving near-duplicate analysis (similarity {similarity:.2f})")
+        return cached
+    
+    async def _cache_careers(self, cache_key: str, careers: List[Dict[str, Any]], user_input: str):
+        await self.cache.set(cache_key, careers, user_input)
+        if self.semantic_index is not None:
+            self.semantic_index.add(user_input, cache_key)
+    
+    async def _generate_careers_async(self, user_input: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Generate, parse and enrich careers using the configured analysis mode; raises on any
+        failure. Returns the careers and whether the output was complete (nothing cut off).
+        """
+        if self.analysis_mode == 'parallel':
+            career_data, complete = await self._generate_careers_parallel_async(user_input)
+        else:
+            response_text = await self._generate_text_async(self._build_career_analysis_prompt(user_input))
+            with span("parse"):
+                career_data, complete = self._parse_gemini_response(response_text)
+        
+        # Enrichment is local unless an image model is configured
+        with span("enhance"):
+            if self.image_service.uses_model:
+                return await asyncio.to_thread(self._enhance_with_sa_data, career_data), complete
+            return self._enhance_with_sa_data(career_data), complete
+    
+    async def _generate_text_async(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        """
+        Run a single generation under the concurrency limit, circuit breaker and per-call
+        deadline, and return its text. Raises CircuitOpenError without waiting when Gemini
+        is known to be failing.
+        """
+        self.breaker.check()
+        async with self._generation_slot():
+            record_model_call('text')
+            with span("generation"):
+                return await self.breaker.call(
+                    lambda: self.provider.generate(prompt, max_output_tokens),
+                    timeout=self.call_timeout
+                )
+    
+    @contextlib.asynccontextmanager
+    async def _generation_slot(self):
         """
-        Generate line art image of Black African professional
+        Hold one of the GEMINI_MAX_CONCURRENCY generation slots
         """
+        self.queued_generations += 1
         try:
-            image_prompt = f"""
-Create a professional line art illustration of a Black African person working as a {career_title}. 
-The image should be:
-- Simple black line art on white background
-- Professional and inspiring
-- Showing the person engaged in their work
-- Minimalist style, suitable for career guidance
-- Representing South African professional excellence
-            """
+            with span("generation_queue"):
+                await self._semaphore.acquire()
+        finally:
+            self.queued_generations -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+    
+    async def _generate_careers_parallel_async(self, user_input: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Ask for career titles with a short generation, then generate every career at once.
+        Careers that have not finished by the deadline are dropped, so latency is bounded by
+        the slowest career that makes it in rather than the sum of all of them. Returns the
+        careers and whether all of them came from complete output.
+        """
+        titles_text = await self._generate_text_async(self._build_career_titles_prompt(user_input), max_output_tokens=200)
+        titles = self._parse_career_titles(titles_text)
+        
+        async def generate_one(title: str) -> Tuple[Dict[str, Any], bool]:
+            profile = self.profiles.get(title) if self.profiles is not None else None
+            if profile is not None:
+                return await self._personalize_profile(user_input, profile), True
+            text = await self._generate_text_async(self._build_single_career_prompt(user_input, title), max_output_tokens=3000)
+            with span("parse"):
+                return self._parse_single_career(text)
+        
+        tasks = [asyncio.ensure_future(generate_one(title)) for title in titles]
+        done, pending = await asyncio.wait(tasks, timeout=self.parallel_deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"{len(pending)} of {len(tasks)} careers missed the {self.parallel_deadline}s deadline")
+        
+        # Keep the order the titles were suggested in
+        # A career lost to the deadline or an error leaves the analysis short, so it is not cached
+        careers = []
+        complete = not pending
+        for task in tasks:
+            if task in done and task.exception() is None:
+                career, career_complete = task.result()
+                careers.append(career)
+                complete = complete and career_complete
+            elif task in done:
+                logger.error(f"Error generating career: {str(task.exception())}")
+                complete = False
+        
+        if not careers:
+            raise ValueError("No careers completed before the deadline")
+        return careers, complete and len(careers) >= CAREERS_PER_ANALYSIS
+    
+    async def render_career_profile(self, career_title: str) -> Dict[str, Any]:
+        """
+        Generate the generic, enriched profile for one career; used by CareerProfileStore
+        """
+        text = await self._generate_text_async(self._build_single_career_prompt(GENERIC_PROFILE_INPUT, career_title), max_output_tokens=3000)
+        career, complete = self._parse_single_career(text)
+        if not complete:
+            # A profile is reused for an hour, so keep the previous one instead
+            raise ValueError(f"Profile output for {career_title} was cut off")
+        if self.image_service.uses_model:
+            return await asyncio.to_thread(self._enhance_career, career)
+        return self._enhance_career(career)
+    
+    async def _personalize_profile(self, user_input: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Rewrite only the persona story of a pre-rendered profile for this user.
+        The generic profile is used as-is if personalization is off or fails.
+        """
+        if not self.personalize_profiles:
+            return profile
+        try:
+            text = await self._generate_text_async(self._build_personalization_prompt(user_input, profile), max_output_tokens=300)
+            persona = repair_json(text)[0]["persona"]
+            if not isinstance(persona, dict) or not persona.get("description"):
+                raise ValueError("Personalized persona is missing a description")
+            profile["persona"] = {"title": persona.get("title") or profile["persona"]["title"], "description": persona["description"]}
+        except Exception as e:
+            logger.warning(f"Using generic profile for {profile.get('title')}: {str(e)}")
+        return profile
+    
+    async def stream_career_analysis(self, user_input: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield enriched careers one at a time as the model produces them.
+        Cached analyses are replayed immediately; if the stream fails before any career
+        is produced, the fallback careers are yielded instead.
+        """
+        cache_key = make_cache_key(user_input, PROMPT_VERSION, self.provider.model_name)
+        with span("cache_lookup"):
+            cached = await self._get_cached(cache_key, user_input)
+        if cached is not None:
+            for career in cached:
+                yield career
+            return
+        
+        produced = []
+        dropped = False
+        try:
+            prompt = self._build_career_analysis_prompt(user_input)
+            parser = IncrementalCareerParser(self.parse_stats)
+            
+            self.breaker.check()
+            async with self._generation_slot(), self.breaker.guard() as breaker_call:
+                record_model_call('text')
+                chunks = self.provider.stream(prompt)
+                # Only time spent waiting on the provider counts, not time the client takes to read
+                breaker_call.latency = 0.0
+                stream_ended = False
+                while not stream_ended:
+                    # The deadline applies to each gap between chunks, so a stalled stream fails
+                    wait_start = time.monotonic()
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.call_timeout)
+                    except StopAsyncIteration:
+                        chunk = None
+                    finally:
+                        breaker_call.latency += time.monotonic() - wait_start
+                    if chunk is None:
+                        # Salvage a final career the output cut off part-way through
+                        stream_ended = True
+                        careers = parser.close()
+                    else:
+                        careers = parser.feed(chunk)
+                    for career in careers:
+                        try:
+                            career = self._validate_career(career, parser.was_truncated(career))
+                        except ValueError as e:
+                            logger.warning(f"Dropping streamed career: {str(e)}")
+                            dropped = True
+                            continue
+                        if self.image_service.uses_model:
+                            enhanced = await asyncio.to_thread(self._enhance_career, career)
+                        else:
+                            enhanced = self._enhance_career(career)
+                        produced.append(enhanced)
+                        yield enhanced
             
-            response = self.model.generate_content([image_prompt])
+            if not produced:
+                raise ValueError("No career objects found in streamed response")
             
-            # Note: Gemini 1.5 Flash primarily does text generation
-            # For actual image generation, we'd need to use a different model or service
-            # For now, return placeholder
-            return f"https://api.dicebear.com/7.x/personas/svg?seed={career_title.replace(' ', '')}"
+            # A short analysis is served but not cached, so the next request can get a full one
+            if not parser.truncated and not dropped and len(produced) >= CAREERS_PER_ANALYSIS:
+                await self._cache_careers(cache_key, produced, user_input)
             
         except Exception as e:
-            logger.error(f"Error generating image: {str(e)}")
-            return f"https://api.dicebear.com/7.x/personas/svg?seed={career_title.replace(' ', '')}"
+            logger.error(f"Error streaming career analysis: {str(e)}")
+            if not produced:
+                for career in self._get_fallback_careers(user_input):
+                    yield career
+    
+    def generate_career_image(self, career_title: str) -> str:
+        """
+        Resolve the career card image (local seed URL unless an image model is configured)
+        """
+        return self.image_service.resolve(career_title)
     
     def _build_career_analysis_prompt(self, user_input: str) -> str:
         """
@@ -130,65 +464,224 @@ For each career path, create a CONCISE analysis with these sections:
 Generate exactly 2 career paths. Keep each section concise but impactful. Use ONLY South African Rand (R) for salaries.
 """
 
-    def _parse_gemini_response(self, response_text: str) -> List[Dict[str, Any]]:
+    def _build_career_titles_prompt(self, user_input: str) -> str:
         """
-        Parse Gemini's response and extract career data
+        Build a short prompt that only picks the career titles
         """
-        try:
-            # Find JSON content in the response
-            json_start = response_text.find('[')
-            json_end = response_text.rfind(']') + 1
-            
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No JSON array found in response")
-            
-            json_content = response_text[json_start:json_end]
-            career_data = json.loads(json_content)
-            
-            # Validate the structure
-            for career in career_data:
-                required_fields = ['id', 'title', 'persona', 'dayInLife', 'weekendQuest', 'realityCheck', 'skills', 'timeToMastery', 'averageSalary']
-                for field in required_fields:
-                    if field not in career:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                # Ensure salary is in Rand format
-                if '$' in career['averageSalary']:
-                    # Convert any remaining dollar references to Rand
-                    career['averageSalary'] = career['averageSalary'].replace('$', 'R ')
-            
-            return career_data
-            
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"Error parsing Gemini response: {str(e)}")
+        return f"""
+You are a South African career counselor guiding high school students.
+Based on the user's interests, choose 2 career paths relevant to South Africa and Africa.
+
+User Input: "{user_input}"
+
+Respond with ONLY a JSON array of 2 specific job titles relevant to the SA market, for example:
+["Career Title 1", "Career Title 2"]
+"""
+
+    def _build_single_career_prompt(self, user_input: str, career_title: str) -> str:
+        """
+        Build a prompt for the full analysis of one chosen career
+        """
+        return f"""
+You are a South African career counselor specializing in guiding high school students toward successful careers. 
+Write a CONCISE career analysis for a {career_title}, personalized to the user's interests.
+
+User Input: "{user_input}"
+
+**Important Guidelines:**
+- Persona: brief inspiring story (2-3 sentences) featuring a Black African professional with a South African name
+- Day in Life: concise description (2-3 sentences) of a typical workday
+- Weekend Quest: actionable project with a real YouTube link or course URL
+- Reality Check: honest 2-sentence assessment of challenges and salary expectations
+- Include salary ranges in South African Rand (R) - NO DOLLAR SIGNS
+
+**Response Format - a single JSON object:**
+
+{{
+  "id": "unique-id",
+  "title": "{career_title}",
+  "persona": {{"title": "Meet Your Future Self", "description": "..."}},
+  "dayInLife": {{"title": "A Day in Your Life", "description": "..."}},
+  "weekendQuest": {{"title": "Your Weekend Quest", "description": "..."}},
+  "realityCheck": {{"title": "The Reality Check", "description": "..."}},
+  "skills": ["Essential Skill 1", "Essential Skill 2", "Essential Skill 3"],
+  "timeToMastery": "X years",
+  "averageSalary": "R XXX,XXX - R XXX,XXX"
+}}
+"""
+
+    def _build_personalization_prompt(self, user_input: str, profile: Dict[str, Any]) -> str:
+        """
+        Build a short prompt that only tailors the persona story of a ready-made career profile
+        """
+        return f"""
+You are a South African career counselor guiding high school students.
+Rewrite this "Meet Your Future Self" story for a {profile['title']} so it connects to the user's interests.
+Keep it to 2-3 sentences featuring a Black African professional with a South African name.
+
+User Input: "{user_input}"
+
+Current story: "{profile['persona']['description']}"
+
+Respond with ONLY a JSON object with a persona field:
+{{"persona": {{"title": "Meet Your Future Self", "description": "..."}}}}
+"""
+
+    def _build_packed_career_analysis_prompt(self, user_inputs: List[str]) -> str:
+        """
+        Build one prompt that analyzes several students at once
+        """
+        # One line per student so the numbering stays unambiguous
+        students = "\n".join(f'{number}. "{" ".join(user_input.split())}"' for number, user_input in enumerate(user_inputs, start=1))
+        return f"""
+You are a South African career counselor specializing in guiding high school students toward successful careers. 
+Analyze each of the following students separately and generate 2 personalized career paths for each one, relevant to South Africa and Africa.
+
+Students:
+{students}
+
+**Important Guidelines:**
+- Persona: brief inspiring story (2-3 sentences) featuring a Black African professional with a South African name
+- Day in Life: concise description (2-3 sentences) of a typical workday
+- Weekend Quest: actionable project with a real YouTube link or course URL
+- Reality Check: honest 2-sentence assessment of challenges and salary expectations
+- Include salary ranges in South African Rand (R) - NO DOLLAR SIGNS
+
+**Response Format - a JSON object mapping each student number to an array of exactly 2 careers:**
+
+{{
+  "1": [
+    {{
+      "id": "unique-id-1",
+      "title": "Specific Job Title",
+      "persona": {{"title": "Meet Your Future Self", "description": "..."}},
+      "dayInLife": {{"title": "A Day in Your Life", "description": "..."}},
+      "weekendQuest": {{"title": "Your Weekend Quest", "description": "..."}},
+      "realityCheck": {{"title": "The Reality Check", "description": "..."}},
+      "skills": ["Essential Skill 1", "Essential Skill 2", "Essential Skill 3"],
+      "timeToMastery": "X years",
+      "averageSalary": "R XXX,XXX - R XXX,XXX"
+    }}
+  ]
+}}
+"""
+
+    def _parse_packed_response(self, response_text: str, student_count: int) -> Dict[int, Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Extract each student's careers from a packed generation, with whether all of them
+        survived validation; students whose careers are missing or invalid are left out,
+        as is the last student in output that was cut off, since their careers may be incomplete
+        """
+        packed, repairs = repair_json(response_text)
+        for repair in repairs:
+            self.parse_stats.record("json", repair)
+        if not isinstance(packed, dict):
+            raise ValueError("Packed response is not a JSON object")
+        if "truncated" in repairs and packed:
+            packed.pop(list(packed)[-1])
+        
+        results = {}
+        for number in range(1, student_count + 1):
+            careers = packed.get(str(number))
+            if not isinstance(careers, list):
+                continue
+            valid = []
+            for career in careers:
+                try:
+                    valid.append(self._validate_career(career))
+                except ValueError as e:
+                    logger.warning(f"Dropping packed career for student {number}: {str(e)}")
+            if valid:
+                results[number] = (valid, len(valid) == len(careers) and len(valid) >= CAREERS_PER_ANALYSIS)
+        return results
+
+    def _parse_career_titles(self, response_text: str) -> List[str]:
+        """
+        Extract the list of career titles from the titles generation
+        """
+        titles, repairs = repair_json(response_text)
+        for repair in repairs:
+            self.parse_stats.record("json", repair)
+        if not isinstance(titles, list):
+            raise ValueError("No career titles found in response")
+        
+        titles = [str(title).strip() for title in titles if isinstance(title, (str, int, float))]
+        titles = [title for title in titles if title]
+        if not titles:
+            raise ValueError("No career titles found in response")
+        # Each title starts a full generation, so ignore extras the prompt did not ask for
+        return titles[:CAREERS_PER_ANALYSIS]
+
+    def _parse_single_career(self, response_text: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Extract and validate one career object; also returns whether the output was complete
+        """
+        careers, complete = self._extract_careers(response_text)
+        if not careers:
+            raise ValueError("No valid career object found in response")
+        return careers[0], complete
+
+    def _parse_gemini_response(self, response_text: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Parse Gemini's response and extract career data.
+        Every valid career is kept even when others in the array are malformed or the
+        output was cut off; only a response with no usable career at all raises. Also
+        returns whether the output was complete.
+        """
+        careers, complete = self._extract_careers(response_text)
+        if not careers:
+            logger.error("Error parsing Gemini response: no valid career objects")
             logger.error(f"Response text: {response_text[:500]}...")
-            raise
+            raise ValueError("No valid career objects found in response")
+        return careers, complete and len(careers) >= CAREERS_PER_ANALYSIS
+    
+    def _extract_careers(self, response_text: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Recover every career object in model output and validate each one; returns the
+        careers and False if the output was cut off or any career was dropped
+        """
+        parser = IncrementalCareerParser(self.parse_stats)
+        careers = []
+        dropped = False
+        for career in parser.feed(response_text) + parser.close():
+            try:
+                careers.append(self._validate_career(career, parser.was_truncated(career)))
+            except ValueError as e:
+                logger.warning(f"Dropping career from response: {str(e)}")
+                dropped = True
+        return careers, not parser.truncated and not dropped
+    
+    def _validate_career(self, career: Dict[str, Any], truncated: bool = False) -> Dict[str, Any]:
+        """
+        Repair a single parsed career and validate it against the CareerPath schema;
+        returns the career to use, or raises ValueError
+        """
+        return normalize_career(career, self.parse_stats, truncated)
     
     def _enhance_with_sa_data(self, career_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Enhance career data with South African specific information
         """
-        enhanced_careers = []
+        return [self._enhance_career(career) for career in career_data]
+    
+    def _enhance_career(self, career: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add SA institutions, subjects, image and APS explanation to one career
+        """
+        # Get SA institutions and subjects
+        institutions = get_institutions_for_career(career['title'])
+        subjects = get_subjects_for_career(career['title'])
         
-        for career in career_data:
-            # Get SA institutions and subjects
-            institutions = get_institutions_for_career(career['title'])
-            subjects = get_subjects_for_career(career['title'])
-            
-            # Generate career image
-            image_url = self.generate_career_image(career['title'])
-            
-            enhanced_career = {
-                **career,
-                'institutions': institutions,
-                'subjects': subjects,
-                'imageUrl': image_url,
-                'apsExplanation': APS_EXPLANATION
-            }
-            
-            enhanced_careers.append(enhanced_career)
+        # Resolve career image
+        image_url = self.generate_career_image(career['title'])
         
-        return enhanced_careers
+        return {
+            **career,
+            'institutions': institutions,
+            'subjects': subjects,
+            'imageUrl': image_url,
+            'apsExplanation': APS_EXPLANATION
+        }
     
     def _get_fallback_careers(self, user_input: str) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,103 @@
+import gzip
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from .etags import encoded_etag
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed, and with compact
+    separators through the standard library otherwise
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "application/javascript")
+
+class CompressionMiddleware:
+    """
+    Compresses complete responses of at least minimum_size bytes: brotli when the client
+    accepts it and the brotli package is installed, gzip otherwise.
+
+    Streaming responses (SSE, NDJSON) are passed through untouched so events are not held
+    back waiting for a compression block to fill. A strong ETag on a compressed response
+    gets an encoding suffix, and a 304 echoes the suffixed tag the client sent.
+    """
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_headers = Headers(scope=scope)
+        accepted = request_headers.get("accept-encoding", "")
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows whether it is streaming
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            etag = headers.get("etag")
+            strong_etag = etag is not None and not etag.startswith("W/")
+            if start["status"] == 304:
+                if strong_etag and encoded_etag(etag, encoding) in request_headers.get("if-none-match", ""):
+                    headers["ETag"] = encoded_etag(etag, encoding)
+                await send(start)
+                await send(message)
+                return
+            
+            content_type = headers.get("content-type", "")
+            if (message.get("more_body", False) or len(body) < self.minimum_size
+                    or "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                await send(start)
+                await send(message)
+                return
+            
+            if encoding == "br":
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=self.gzip_level)
+            headers["Content-Encoding"] = encoding
+            if strong_etag:
+                headers["ETag"] = encoded_etag(etag, encoding)
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,84 @@
+import os
+import base64
+import logging
+from collections import OrderedDict
+from typing import Optional
+from .model_calls import record_model_call
+
+logger = logging.getLogger(__name__)
+
+class CareerImageService:
+    """
+    Resolves the illustration shown on each career card.
+
+    The default "local" backend builds a deterministic dicebear seed URL and makes no
+    network or model calls. Setting CAREER_IMAGE_BACKEND=gemini together with
+    CAREER_IMAGE_MODEL (an image-capable Gemini model) renders a line-art image once
+    per career title; results are cached so each title costs at most one call.
+    """
+    def __init__(self, backend: Optional[str] = None, model_name: Optional[str] = None, cache_size: Optional[int] = None):
+        self.backend = (backend or os.environ.get('CAREER_IMAGE_BACKEND', 'local')).lower()
+        self.model_name = model_name or os.environ.get('CAREER_IMAGE_MODEL')
+        self.cache_size = cache_size or int(os.environ.get('CAREER_IMAGE_CACHE_SIZE', '512'))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.model = None
+        
+        if self.backend == 'gemini':
+            if not self.model_name:
+                logger.warning("CAREER_IMAGE_BACKEND=gemini but CAREER_IMAGE_MODEL is not set, using local images")
+                self.backend = 'local'
+            else:
+                import google.generativeai as genai
+                self.model = genai.GenerativeModel(self.model_name)
+    
+    @property
+    def uses_model(self) -> bool:
+        """True when resolving an uncached title may call a model"""
+        return self.model is not None
+    
+    def local_image_url(self, career_title: str) -> str:
+        """Deterministic avatar URL for a career title"""
+        return f"https://api.dicebear.com/7.x/personas/svg?seed={career_title.replace(' ', '')}"
+    
+    def resolve(self, career_title: str) -> str:
+        """Return an image URL for the career, calling a model only when one is configured"""
+        key = ' '.join(career_title.lower().split())
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        
+        image_url = None
+        if self.model is not None:
+            image_url = self._render_with_model(career_title)
+        if image_url is None:
+            image_url = self.local_image_url(career_title)
+        
+        self._cache[key] = image_url
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return image_url
+    
+    def _render_with_model(self, career_title: str) -> Optional[str]:
+        """Render a line-art illustration and return it as a data URL"""
+        image_prompt = f"""
+Create a professional line art illustration of a Black African person working as a {career_title}. 
+The image should be:
+- Simple black line art on white background
+- Professional and inspiring
+- Showing the person engaged in their work
+- Minimalist style, suitable for career guidance
+- Representing South African professional excellence
+        """
+        try:
+            record_model_call('image')
+            response = self.model.generate_content([image_prompt])
+            for part in response.parts:
+                inline_data = getattr(part, 'inline_data', None)
+                if inline_data and inline_data.mime_type.startswith('image/'):
+                    encoded = base64.b64encode(inline_data.data).decode('ascii')
+                    return f"data:{inline_data.mime_type};base64,{encoded}"
+            logger.warning(f"Image model returned no image for {career_title}")
+        except Exception as e:
+            logger.error(f"Error generating image: {str(e)}")
+        return None
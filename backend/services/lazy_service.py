@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyService:
+    """
+    Builds a service on first use instead of at import.
+
+    Each service is initialized independently, so one failing (for example Gemini
+    without an API key) leaves the others working. A failed build is retried after
+    retry_seconds rather than on every request.
+    """
+    def __init__(self, name: str, factory: Callable[[], Any], retry_seconds: float = 30.0):
+        self.name = name
+        self.factory = factory
+        self.retry_seconds = retry_seconds
+        self._instance: Optional[Any] = None
+        self._error: Optional[str] = None
+        self._failed_at = 0.0
+        self._init_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def get(self) -> Optional[Any]:
+        """Return the service, building it if needed; None if it can't be built right now"""
+        if self._instance is not None:
+            return self._instance
+        if self._error is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+            return None
+        
+        with self._lock:
+            if self._instance is None:
+                start = time.perf_counter()
+                try:
+                    self._instance = self.factory()
+                    self._error = None
+                    self._init_seconds = time.perf_counter() - start
+                    logger.info(f"{self.name} service initialized in {self._init_seconds * 1000:.0f}ms")
+                except Exception as e:
+                    self._error = str(e)
+                    self._failed_at = time.monotonic()
+                    logger.error(f"Failed to initialize {self.name} service: {str(e)}")
+        return self._instance
+    
+    async def get_async(self) -> Optional[Any]:
+        """get() for async callers: a build (or a wait on another thread's build) runs off the event loop"""
+        if self._instance is not None:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+    
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+    
+    def status(self) -> Dict[str, Any]:
+        if self._instance is not None:
+            return {"status": "ready", "init_ms": round(self._init_seconds * 1000, 1)}
+        if self._error is not None:
+            return {"status": "failed", "error": self._error}
+        return {"status": "not_initialized"}
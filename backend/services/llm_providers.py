@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import logging
+from typing import AsyncIterator, List
+
+logger = logging.getLogger(__name__)
+
+class LLMProviderError(Exception):
+    """Raised by a provider when a generation fails"""
+
+class LLMProvider:
+    """
+    Text generation backend used by GeminiService.
+
+    Providers only turn a prompt into text; prompting, parsing, caching, deadlines and
+    circuit breaking all stay in GeminiService, so swapping providers never touches
+    server.py.
+    """
+    name = "base"
+    model_name = "base"
+    # Most output tokens a single generation may ask for
+    max_output_tokens = 8192
+    
+    async def generate(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        raise NotImplementedError
+    
+    async def stream(self, prompt: str, max_output_tokens: int = 6000) -> AsyncIterator[str]:
+        """Yield the generation in chunks; defaults to a single chunk"""
+        yield await self.generate(prompt, max_output_tokens)
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google.generativeai"""
+    name = "gemini"
+    
+    def __init__(self, model_name: str = 'gemini-1.5-flash'):
+        api_key = os.environ.get('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+        
+        import google.generativeai as genai
+        self._genai = genai
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+    
+    def _generation_config(self, max_output_tokens: int):
+        return self._genai.types.GenerationConfig(
+            temperature=0.8,
+            top_p=0.9,
+            max_output_tokens=max_output_tokens,
+        )
+    
+    async def generate(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        response = await self.model.generate_content_async(prompt, generation_config=self._generation_config(max_output_tokens))
+        return response.text
+    
+    async def stream(self, prompt: str, max_output_tokens: int = 6000) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=self._generation_config(max_output_tokens),
+            stream=True
+        )
+        async for chunk in response:
+            yield chunk.text
+
+class OfflineProvider(LLMProvider):
+    """
+    Deterministic, network-free stand-in for load tests, benchmarks and CI.
+
+    Returns schema-valid career JSON for each prompt shape GeminiService uses (full
+    analysis, packed analysis, title list, single career, persona rewrite); the same
+    prompt always yields the same text.
+    Latency is drawn from a normal distribution (OFFLINE_LLM_LATENCY_MS mean,
+    OFFLINE_LLM_LATENCY_JITTER_MS standard deviation) and OFFLINE_LLM_ERROR_RATE of
+    calls fail with LLMProviderError.
+    """
+    name = "offline"
+    model_name = "offline-v1"
+    
+    CAREERS = [
+        ("Software Developer", ["Python", "JavaScript", "Problem Solving"], "R350,000 - R750,000"),
+        ("Data Scientist", ["Statistics", "Python", "Machine Learning"], "R450,000 - R900,000"),
+        ("Clinical Psychologist", ["Empathy", "Research", "Communication"], "R300,000 - R650,000"),
+        ("Mechanical Engineer", ["Mathematics", "CAD", "Systems Thinking"], "R400,000 - R850,000"),
+        ("Medical Doctor", ["Biology", "Decision Making", "Resilience"], "R600,000 - R1,500,000"),
+        ("Business Analyst", ["Excel", "Communication", "Process Modelling"], "R350,000 - R700,000"),
+    ]
+    
+    def __init__(self, latency_ms: float = None, jitter_ms: float = None, error_rate: float = None, chunk_size: int = 80):
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.environ.get('OFFLINE_LLM_LATENCY_MS', '0'))
+        self.jitter_ms = jitter_ms if jitter_ms is not None else float(os.environ.get('OFFLINE_LLM_LATENCY_JITTER_MS', '0'))
+        self.error_rate = error_rate if error_rate is not None else float(os.environ.get('OFFLINE_LLM_ERROR_RATE', '0'))
+        self.chunk_size = chunk_size
+        self._rng = random.Random(int(os.environ.get('OFFLINE_LLM_SEED', '0')))
+    
+    async def generate(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        await asyncio.sleep(self._draw_latency())
+        self._maybe_fail()
+        return self._respond(prompt)
+    
+    async def stream(self, prompt: str, max_output_tokens: int = 6000) -> AsyncIterator[str]:
+        text = self._respond(prompt)
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        # Spread the drawn latency over the chunks, front-loading time to first token
+        latency = self._draw_latency()
+        await asyncio.sleep(latency / 2)
+        self._maybe_fail()
+        for chunk in chunks:
+            await asyncio.sleep(latency / 2 / len(chunks))
+            yield chunk
+    
+    def _draw_latency(self) -> float:
+        return max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+    
+    def _maybe_fail(self):
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise LLMProviderError("Simulated offline provider failure")
+    
+    def _respond(self, prompt: str) -> str:
+        if "mapping each student number" in prompt:
+            students = re.findall(r'^(\d+)\. "(.*)"$', prompt, re.MULTILINE)
+            return "```json\n" + json.dumps({number: self._careers_for(student) for number, student in students}) + "\n```"
+        
+        match = re.search(r'User Input: "(.*)"', prompt)
+        user_input = match.group(1) if match else prompt
+        seed = int(hashlib.sha256(user_input.encode("utf-8")).hexdigest(), 16)
+        
+        if "ONLY a JSON object with a persona" in prompt:
+            title_match = re.search(r"story for a (.+?) so it connects", prompt)
+            title = title_match.group(1) if title_match else "professional"
+            return json.dumps({"persona": {
+                "title": "Meet Your Future Self",
+                "description": f"You're Lerato Dlamini, a {title} who turned a love of {user_input[:60]} into a career in Cape Town."
+            }})
+        
+        if "ONLY a JSON array" in prompt:
+            return json.dumps([career[0] for career in self._pick(seed, 2)])
+        
+        if "a single JSON object" in prompt:
+            title_match = re.search(r"career analysis for a (.+?), personalized", prompt)
+            title = title_match.group(1) if title_match else self._pick(seed, 1)[0][0]
+            career = next((c for c in self.CAREERS if c[0] == title), (title, ["Communication", "Teamwork", "Curiosity"], "R300,000 - R600,000"))
+            return "```json\n" + json.dumps(self._career(career, 1)) + "\n```"
+        
+        return "```json\n" + json.dumps(self._careers_for(user_input), indent=2) + "\n```"
+    
+    def _careers_for(self, user_input: str) -> List[dict]:
+        seed = int(hashlib.sha256(user_input.encode("utf-8")).hexdigest(), 16)
+        return [self._career(career, i + 1) for i, career in enumerate(self._pick(seed, 2))]
+    
+    def _pick(self, seed: int, count: int) -> List[tuple]:
+        start = seed % len(self.CAREERS)
+        return [self.CAREERS[(start + i) % len(self.CAREERS)] for i in range(count)]
+    
+    def _career(self, career: tuple, number: int) -> dict:
+        title, skills, salary = career
+        return {
+            "id": f"offline-{title.lower().replace(' ', '-')}-{number}",
+            "title": title,
+            "persona": {
+                "title": "Meet Your Future Self",
+                "description": f"You're Thandiwe Nkosi, a {title} in Johannesburg whose work is changing how South Africans live and learn."
+            },
+            "dayInLife": {
+                "title": "A Day in Your Life",
+                "description": f"Your mornings start with planning alongside your team, and your afternoons go to the hands-on work every {title} knows best."
+            },
+            "weekendQuest": {
+                "title": "Your Weekend Quest",
+                "description": "Spend the weekend on a small starter project following this course: https://www.youtube.com/watch?v=rfscVS0vtbw"
+            },
+            "realityCheck": {
+                "title": "The Reality Check",
+                "description": f"The path takes years of study and practice. Salaries typically range {salary}."
+            },
+            "skills": skills,
+            "timeToMastery": "4-6 years",
+            "averageSalary": salary
+        }
+
+def get_llm_provider(name: str = None) -> LLMProvider:
+    """Build the provider named by LLM_PROVIDER ("gemini" by default, or "offline")"""
+    name = (name or os.environ.get('LLM_PROVIDER', 'gemini')).lower()
+    if name == 'offline':
+        return OfflineProvider()
+    if name == 'gemini':
+        return GeminiProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, spanning session lookups to slow generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format"""
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> (bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = dict(zip(self.label_names, key))
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': repr(bound)})} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+# A collector returns (name, type, help, [(labels, value), ...]) for values read at scrape time
+Collector = Callable[[], List[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._collectors: List[Collector] = []
+    
+    def histogram(self, name: str, help_text: str, label_names: Iterable[str] = ()) -> Histogram:
+        histogram = Histogram(name, help_text, label_names)
+        self._histograms.append(histogram)
+        return histogram
+    
+    def register_collector(self, collector: Collector):
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for collector in self._collectors:
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    if value is None or (isinstance(value, float) and math.isnan(value)):
+                        continue
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "questly_stage_duration_seconds",
+    "Time spent in each stage of request handling",
+    ["stage"]
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "questly_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"]
+)
+
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """Begin collecting stage timings for the current request"""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into the stage histogram and the current request's Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, duration))
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """Render stage timings as a Server-Timing header, summing repeated stages"""
+    totals: Dict[str, float] = {}
+    for stage, duration in timings:
+        totals[stage] = totals.get(stage, 0.0) + duration
+    return ", ".join(f"{stage};dur={duration * 1000:.1f}" for stage, duration in totals.items())
@@ -0,0 +1,30 @@
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+class ModelCallCounter:
+    """Tally of model calls made while serving a single request"""
+    def __init__(self):
+        self.count = 0
+        self.by_kind: Dict[str, int] = {}
+    
+    def add(self, kind: str):
+        self.count += 1
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+# Process-wide totals, by call kind ("text", "image", ...)
+TOTAL_MODEL_CALLS: Dict[str, int] = {}
+
+_current_counter: ContextVar[Optional[ModelCallCounter]] = ContextVar("model_call_counter", default=None)
+
+def start_model_call_count() -> ModelCallCounter:
+    """Begin counting model calls for the current request context"""
+    counter = ModelCallCounter()
+    _current_counter.set(counter)
+    return counter
+
+def record_model_call(kind: str):
+    """Record one outbound model call against the current request (if any) and the process totals"""
+    TOTAL_MODEL_CALLS[kind] = TOTAL_MODEL_CALLS.get(kind, 0) + 1
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.add(kind)
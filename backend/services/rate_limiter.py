@@ -0,0 +1,94 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets held in process memory.
+
+    Each key refills at rate_per_minute up to burst tokens and every request spends its
+    cost (one by default). A request costing more than burst is let through on a full
+    bucket and leaves the bucket in debt, so it is paid for before the next one.
+    Buckets for the least recently seen keys are dropped beyond max_keys; a dropped key
+    simply starts again with a full bucket.
+    """
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    def acquire(self, key: str, cost: int = 1) -> float:
+        """Spend cost tokens for key; returns 0 if allowed, else seconds until enough are available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        needed = min(cost, self.burst)
+        
+        if tokens >= needed:
+            self._buckets[key] = (tokens - cost, now)
+            retry_after = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (needed - tokens) / self.rate if self.rate > 0 else 60.0
+        
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+class MongoRateCounter:
+    """
+    Fixed one-minute windows counted in a shared MongoDB collection, so the limit holds
+    across every worker. Documents carry an expires_at for the TTL index to clean up.
+    Fails open: if Mongo can't be reached the request is allowed.
+    """
+    def __init__(self, collection, limit_per_minute: int):
+        self.collection = collection
+        self.limit = limit_per_minute
+    
+    async def acquire(self, key: str, cost: int = 1) -> float:
+        now = datetime.now(timezone.utc)
+        window_start = now.replace(second=0, microsecond=0)
+        window_end = window_start + timedelta(minutes=1)
+        try:
+            counter = await self.collection.find_one_and_update(
+                {"_id": f"{key}|{window_start.isoformat()}"},
+                {"$inc": {"count": cost}, "$setOnInsert": {"expires_at": window_end}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError as e:
+            logger.warning(f"Shared rate limit check failed, allowing request: {str(e)}")
+            return 0.0
+        
+        # Refused only once the window was already used up before this request
+        if counter["count"] - cost >= self.limit:
+            return max((window_end - now).total_seconds(), 0.0)
+        return 0.0
+
+class RateLimitPolicy:
+    """
+    A named limit: the local token bucket always applies, and the shared counter too
+    when one is configured
+    """
+    def __init__(self, name: str, rate_per_minute: float, burst: int, shared_collection=None):
+        self.name = name
+        self.local = TokenBucketLimiter(rate_per_minute, burst)
+        self.shared = MongoRateCounter(shared_collection, int(rate_per_minute)) if shared_collection is not None else None
+        self.stats = {"allowed": 0, "limited": 0}
+    
+    async def acquire(self, key: str, cost: int = 1) -> float:
+        """Returns 0 if the request may proceed, else the seconds to wait before retrying"""
+        retry_after = self.local.acquire(key, cost)
+        if not retry_after and self.shared is not None:
+            retry_after = await self.shared.acquire(f"{self.name}|{key}", cost)
+        
+        self.stats["limited" if retry_after else "allowed"] += 1
+        return retry_after
@@ -1,4 +1,14 @@
 # South African educational data and institutions
+import os
+import re
+import copy
+import json
+import math
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
 
 SA_INSTITUTIONS = {
     "universities": [
@@ -109,12 +119,25 @@ APS_EXPLANATION = """
 - Calculate: Add your final matric marks for 7 subjects
 """
 
-def get_institutions_for_career(career_title: str):
-    """Get relevant SA institutions for a career path"""
-    career_lower = career_title.lower()
-    
-    if "engineer" in career_lower or "developer" in career_lower or "data scientist" in career_lower:
-        return [
+# Alternative titles that should resolve to a CAREER_SUBJECTS_MAP entry. A one-word
+# synonym matches every title containing that word, so bare "Engineer", "Analyst" or
+# "Doctor" would send Civil Engineers, Financial Analysts and Doctors of Philosophy here
+CAREER_SYNONYMS = {
+    "Software Developer": ["Software Engineer", "Programmer", "Web Developer", "App Developer", "Full Stack Developer", "Coder"],
+    "Data Scientist": ["Data Analyst", "Machine Learning Engineer", "Data Engineer", "Statistician"],
+    "Clinical Psychologist": ["Psychologist", "Counselling Psychologist", "Therapist"],
+    "Mechanical Engineer": ["Mechatronics Engineer", "Mechanical Engineering Technologist", "Automotive Engineer"],
+    "Medical Doctor": ["General Practitioner", "Medical Practitioner", "Physician", "Surgeon"],
+    "Business Analyst": ["Business Systems Analyst", "Systems Analyst", "Management Consultant"]
+}
+
+# Programme recommendations per career family, checked in order; keywords are matched
+# against the career title through the career index
+PROGRAMME_GROUPS = [
+    {
+        "name": "engineering_and_computing",
+        "keywords": ["engineer", "engineering", "software developer", "web developer", "app developer", "full stack developer", "data scientist", "programmer"],
+        "institutions": [
             {
                 "institution": "University of the Witwatersrand (Wits)",
                 "programme": "Bachelor of Science in Engineering/Computer Science", 
@@ -137,9 +160,11 @@ def get_institutions_for_career(career_title: str):
                 "location": "Johannesburg, Gauteng"
             }
         ]
-    
-    elif "psychologist" in career_lower or "counselor" in career_lower:
-        return [
+    },
+    {
+        "name": "psychology",
+        "keywords": ["psychologist", "counselor", "counsellor", "therapist"],
+        "institutions": [
             {
                 "institution": "University of Cape Town (UCT)",
                 "programme": "Bachelor of Social Science in Psychology",
@@ -155,9 +180,11 @@ def get_institutions_for_career(career_title: str):
                 "location": "Johannesburg, Gauteng"
             }
         ]
-    
-    elif "medical" in career_lower or "doctor" in career_lower:
-        return [
+    },
+    {
+        "name": "medicine",
+        "keywords": ["medical", "medical doctor", "physician", "surgeon", "general practitioner"],
+        "institutions": [
             {
                 "institution": "University of Cape Town (UCT)",
                 "programme": "Bachelor of Medicine and Bachelor of Surgery (MBChB)",
@@ -173,38 +200,156 @@ def get_institutions_for_career(career_title: str):
                 "location": "Johannesburg, Gauteng"
             }
         ]
+    }
+]
+
+DEFAULT_INSTITUTIONS = [
+    {
+        "institution": "University of Pretoria (UP)",
+        "programme": "Relevant Bachelor's Degree",
+        "duration": "3-4 years",
+        "aps_required": "35+",
+        "location": "Pretoria, Gauteng"
+    },
+    {
+        "institution": "Stellenbosch University", 
+        "programme": "Relevant Bachelor's Degree",
+        "duration": "3-4 years",
+        "aps_required": "38+",
+        "location": "Stellenbosch, Western Cape"
+    }
+]
+
+DEFAULT_SUBJECTS = {
+    "essential": ["Mathematics", "English Home Language", "Physical Sciences"],
+    "recommended": ["Information Technology", "Life Sciences", "Accounting"],
+    "aps_range": "35-45",
+    "min_aps": 35
+}
+
+def normalize_career_title(title: str) -> List[str]:
+    """Lowercase, strip punctuation and reduce simple plurals/-ing forms to a token list"""
+    tokens = []
+    for token in re.sub(r"[^a-z0-9\s]", " ", title.lower()).split():
+        if len(token) > 5 and token.endswith("ing"):
+            token = token[:-3]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def _terms(tokens: List[str]) -> List[str]:
+    """Unigram and bigram terms for a token list"""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+class CareerIndex:
+    """
+    Inverted index from title terms (tokens and bigrams) to catalogue entries.
+
+    Each entry has one or more aliases. A title matches an alias when the IDF-weighted
+    share of the alias's terms found in the title reaches min_coverage, so "Senior
+    Software Developer" matches "Software Developer" but "Data Entry Clerk" does not
+    match "Data Scientist". Ties go to the alias with more matched weight (the more
+    specific one), then to the entry registered first.
+    """
+    def __init__(self, entries: List[Tuple[str, List[str]]], min_coverage: float = 0.75):
+        self.min_coverage = min_coverage
+        self._order: Dict[str, int] = {}
+        self._alias_terms: List[Tuple[str, List[str]]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        
+        for position, (key, aliases) in enumerate(entries):
+            self._order.setdefault(key, position)
+            for alias in aliases:
+                terms = list(dict.fromkeys(_terms(normalize_career_title(alias))))
+                if not terms:
+                    continue
+                alias_id = len(self._alias_terms)
+                self._alias_terms.append((key, terms))
+                for term in terms:
+                    self._postings.setdefault(term, set()).add(alias_id)
+        
+        alias_count = max(len(self._alias_terms), 1)
+        self._idf = {term: math.log(1 + alias_count / len(ids)) for term, ids in self._postings.items()}
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
     
-    else:
-        return [
-            {
-                "institution": "University of Pretoria (UP)",
-                "programme": "Relevant Bachelor's Degree",
-                "duration": "3-4 years",
-                "aps_required": "35+",
-                "location": "Pretoria, Gauteng"
-            },
-            {
-                "institution": "Stellenbosch University", 
-                "programme": "Relevant Bachelor's Degree",
-                "duration": "3-4 years",
-                "aps_required": "38+",
-                "location": "Stellenbosch, Western Cape"
-            }
-        ]
+    def _lookup(self, title: str) -> Optional[str]:
+        """Return the best matching entry key for a career title, or None"""
+        title_terms = set(_terms(normalize_career_title(title)))
+        
+        matched: Dict[int, float] = {}
+        for term in title_terms:
+            for alias_id in self._postings.get(term, ()):
+                matched[alias_id] = matched.get(alias_id, 0.0) + self._idf[term]
+        
+        best_key, best_rank = None, None
+        for alias_id, weight in matched.items():
+            key, terms = self._alias_terms[alias_id]
+            # Rounded so float summation order can't break ties between full matches
+            coverage = round(weight / sum(self._idf[term] for term in terms), 6)
+            if coverage < self.min_coverage:
+                continue
+            rank = (coverage, weight, -self._order[key])
+            if best_rank is None or rank > best_rank:
+                best_key, best_rank = key, rank
+        return best_key
+
+def _build_indexes():
+    global SUBJECTS_INDEX, PROGRAMME_INDEX
+    SUBJECTS_INDEX = CareerIndex([
+        (title, [title] + CAREER_SYNONYMS.get(title, [])) for title in CAREER_SUBJECTS_MAP
+    ])
+    PROGRAMME_INDEX = CareerIndex([
+        (group["name"], group["keywords"]) for group in PROGRAMME_GROUPS
+    ])
+
+def load_career_catalogue(path: str):
+    """
+    Merge careers and programme groups from a JSON catalogue file and rebuild the indexes.
+
+    Format: {"careers": {"Title": {"essential": [...], "recommended": [...], "aps_range": "..",
+    "min_aps": 0, "synonyms": [...]}}, "programme_groups": [{"name": "..", "keywords": [...],
+    "institutions": [...]}]}. Programme groups replace existing groups with the same name.
+    """
+    with open(path, encoding="utf-8") as f:
+        catalogue = json.load(f)
+    
+    for title, career in catalogue.get("careers", {}).items():
+        career = dict(career)
+        synonyms = career.pop("synonyms", [])
+        CAREER_SUBJECTS_MAP[title] = career
+        if synonyms:
+            CAREER_SYNONYMS[title] = synonyms
+    
+    for group in catalogue.get("programme_groups", []):
+        for i, existing in enumerate(PROGRAMME_GROUPS):
+            if existing["name"] == group["name"]:
+                PROGRAMME_GROUPS[i] = group
+                break
+        else:
+            PROGRAMME_GROUPS.append(group)
+    
+    _build_indexes()
+    logger.info(f"Loaded career catalogue from {path}: {len(CAREER_SUBJECTS_MAP)} careers, {len(PROGRAMME_GROUPS)} programme groups")
+
+_build_indexes()
+
+if os.environ.get("CAREER_CATALOGUE_PATH"):
+    load_career_catalogue(os.environ["CAREER_CATALOGUE_PATH"])
+
+def get_institutions_for_career(career_title: str):
+    """Get relevant SA institutions for a career path"""
+    group_name = PROGRAMME_INDEX.lookup(career_title)
+    for group in PROGRAMME_GROUPS:
+        if group["name"] == group_name:
+            return copy.deepcopy(group["institutions"])
+    return copy.deepcopy(DEFAULT_INSTITUTIONS)
 
 def get_subjects_for_career(career_title: str):
     """Get subject recommendations for a career"""
-    career_lower = career_title.lower()
-    
-    # Find best match in CAREER_SUBJECTS_MAP
-    for career_key, subjects in CAREER_SUBJECTS_MAP.items():
-        if career_key.lower() in career_lower or any(word in career_lower for word in career_key.lower().split()):
-            return subjects
+    career_key = SUBJECTS_INDEX.lookup(career_title)
+    if career_key is not None:
+        return copy.deepcopy(CAREER_SUBJECTS_MAP[career_key])
     
     # Default recommendations
-    return {
-        "essential": ["Mathematics", "English Home Language", "Physical Sciences"],
-        "recommended": ["Information Technology", "Life Sciences", "Accounting"],
-        "aps_range": "35-45",
-        "min_aps": 35
-    }
\ No newline at end of file
+    return copy.deepcopy(DEFAULT_SUBJECTS)
@@ -0,0 +1,131 @@
+import hashlib
+import math
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+# Filler words that carry no signal about which careers fit. Negations and sentiment
+# verbs are handled separately so "I don't like maths" stays far from "I like maths"
+STOPWORDS = {
+    "a", "an", "and", "but", "the", "i", "im", "me", "my", "am", "is", "are", "to", "of", "in",
+    "on", "for", "with", "at", "about", "also", "really", "very", "so", "too", "it", "that",
+    "this", "interest", "interested", "interests", "into", "would", "be", "doing", "do",
+    "things", "thing", "stuff",
+}
+
+# Sentiment words folded onto one token each way, so "love maths" and "enjoy maths" agree.
+# Liking is what students mean by default, so only dislike adds features
+SENTIMENT = {
+    "like": "like", "love": "like", "loves": "like", "enjoy": "like", "enjoys": "like",
+    "adore": "like", "passion": "like", "passionate": "like", "fond": "like", "want": "like",
+    "hate": "hate", "hates": "hate", "dislike": "hate", "dislikes": "hate", "detest": "hate",
+    "loathe": "hate",
+}
+NEGATIONS = {"not", "dont", "doesnt", "didnt", "never", "no", "cant", "wont"}
+
+FEATURE_BUCKETS = 1 << 20
+# Weight of a word the student said they dislike, enough to keep "I don't like maths"
+# below the threshold from "I like maths"
+DISLIKE_WEIGHT = 2.0
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "es", "s", "e"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+def _bucket(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big") % FEATURE_BUCKETS
+
+def embed(text: str) -> Dict[int, float]:
+    """
+    Hashed bag-of-features vector for a student's input, L2-normalized.
+    Features are stemmed content words and character trigrams of those words (at a lower
+    weight), so inflection and small typos barely move the vector. Word order is
+    ignored, except that each word under a dislike ("hate", "don't like") also gets a
+    dislike feature, so "hate maths but love art" stays far from "love maths but hate
+    art" while "I like X" and "X" stay the same.
+    """
+    tokens = [
+        SENTIMENT.get(word) or _stem(word)
+        for word in re.findall(r"[a-z0-9]+", text.lower().replace("'", ""))
+        if word not in STOPWORDS
+    ]
+    vector: Dict[int, float] = {}
+    words = []
+    sentiment = None
+    for previous, token in zip([None] + tokens, tokens):
+        if token in ("like", "hate"):
+            # "don't like" reads as "hate" and the other way round
+            sentiment = token if previous not in NEGATIONS else ("hate" if token == "like" else "like")
+        elif token not in NEGATIONS:
+            words.append(token)
+            if sentiment == "hate":
+                bucket = _bucket("s:hate " + token)
+                vector[bucket] = vector.get(bucket, 0.0) + DISLIKE_WEIGHT
+    
+    for word in words:
+        bucket = _bucket("w:" + word)
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            bucket = _bucket("c:" + padded[i:i + 3])
+            vector[bucket] = vector.get(bucket, 0.0) + 0.25
+    
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {bucket: weight / norm for bucket, weight in vector.items()} if norm else {}
+
+class SemanticAnalysisIndex:
+    """
+    Nearest-neighbour index from past inputs to analysis cache keys.
+
+    Vectors are sparse, so neighbours are found through an inverted index over feature
+    buckets and scored by cosine similarity. A neighbour at or above
+    SEMANTIC_CACHE_THRESHOLD is treated as the same question and its cache key reused.
+    """
+    def __init__(self, threshold: Optional[float] = None, max_entries: Optional[int] = None):
+        self.threshold = threshold if threshold is not None else float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES', '5000'))
+        self._entries: "OrderedDict[str, Dict[int, float]]" = OrderedDict()
+        self._postings: Dict[int, Set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def lookup(self, user_input: str) -> Optional[Tuple[str, float]]:
+        """Return (cache_key, similarity) of the closest past input above the threshold"""
+        query = embed(user_input)
+        scores: Dict[str, float] = {}
+        for bucket, weight in query.items():
+            for key in self._postings.get(bucket, ()):
+                scores[key] = scores.get(key, 0.0) + weight * self._entries[key][bucket]
+        
+        if scores:
+            key, similarity = max(scores.items(), key=lambda item: item[1])
+            if similarity >= self.threshold:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return key, similarity
+        self.stats["misses"] += 1
+        return None
+    
+    def add(self, user_input: str, cache_key: str):
+        if cache_key in self._entries:
+            self._entries.move_to_end(cache_key)
+            return
+        vector = embed(user_input)
+        if not vector:
+            return
+        self._entries[cache_key] = vector
+        for bucket in vector:
+            self._postings.setdefault(bucket, set()).add(cache_key)
+        while len(self._entries) > self.max_entries:
+            self.remove(next(iter(self._entries)))
+    
+    def remove(self, cache_key: str):
+        vector = self._entries.pop(cache_key, None)
+        for bucket in vector or ():
+            keys = self._postings.get(bucket)
+            if keys is not None:
+                keys.discard(cache_key)
+                if not keys:
+                    del self._postings[bucket]
@@ -0,0 +1,65 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Returned by get() when a token is known not to belong to any session
+MISSING = object()
+
+class SessionCache:
+    """
+    TTL-bounded LRU of session token -> user profile.
+
+    Positive entries live for at most SESSION_CACHE_TTL_SECONDS and never past the
+    session's own expires_at. Unknown tokens are remembered for
+    SESSION_NEGATIVE_TTL_SECONDS so repeated bad tokens don't reach Mongo either.
+    Entries are per-process: a logout on another worker is seen here after the TTL.
+    """
+    def __init__(self, ttl_seconds: Optional[float] = None, negative_ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get('SESSION_CACHE_TTL_SECONDS', '60'))
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else float(os.environ.get('SESSION_NEGATIVE_TTL_SECONDS', '30'))
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', '10000'))
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict]]]" = OrderedDict()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0}
+    
+    def get(self, token: str):
+        """Return the cached user dict, MISSING for a known-bad token, or None on a miss"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        
+        expires_at, user = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            self.stats["misses"] += 1
+            return None
+        
+        self._entries.move_to_end(token)
+        if user is None:
+            self.stats["negative_hits"] += 1
+            return MISSING
+        self.stats["hits"] += 1
+        return dict(user)
+    
+    def put(self, token: str, user: Dict, session_expires_at: datetime):
+        """Cache a valid session, never beyond its own expiry"""
+        if session_expires_at.tzinfo is None:
+            # Mongo hands back naive UTC datetimes
+            session_expires_at = session_expires_at.replace(tzinfo=timezone.utc)
+        expires_at = min(time.time() + self.ttl_seconds, session_expires_at.timestamp())
+        self._store(token, expires_at, dict(user))
+    
+    def put_missing(self, token: str):
+        """Remember that a token has no valid session"""
+        self._store(token, time.time() + self.negative_ttl_seconds, None)
+    
+    def invalidate(self, token: str):
+        self._entries.pop(token, None)
+    
+    def _store(self, token: str, expires_at: float, user: Optional[Dict]):
+        self._entries[token] = (expires_at, user)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
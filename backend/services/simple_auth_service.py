@@ -1,16 +1,31 @@
 from fastapi import HTTPException, Request, Response
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+import asyncio
+import os
 import secrets
 import bcrypt
 import logging
 from typing import Optional, Dict
 import re
+from .session_cache import SessionCache, MISSING
+from .metrics import span
 
 logger = logging.getLogger(__name__)
 
 class SimpleAuthService:
     def __init__(self, db):
         self.db = db
+        
+        # bcrypt releases the GIL, so a thread pool keeps hashing off the event loop
+        self.bcrypt_rounds = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+        hash_workers = int(os.environ.get('AUTH_HASH_WORKERS', str(os.cpu_count() or 2)))
+        self._hash_executor = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="bcrypt")
+        # Hashes queued or running on the pool; the API sheds logins when this grows too long
+        self.pending_hashes = 0
+        
+        # Resolves hot-path session lookups without a Mongo round trip
+        self.session_cache = SessionCache()
     
     def validate_email(self, email: str) -> bool:
         """Validate email format"""
@@ -19,7 +34,7 @@ class SimpleAuthService:
     
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     
@@ -27,6 +42,32 @@ class SimpleAuthService:
         """Verify password against hash"""
         return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
     
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password on the bcrypt worker pool"""
+        loop = asyncio.get_running_loop()
+        self.pending_hashes += 1
+        try:
+            return await loop.run_in_executor(self._hash_executor, self.hash_password, password)
+        finally:
+            self.pending_hashes -= 1
+    
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        """Verify password on the bcrypt worker pool"""
+        loop = asyncio.get_running_loop()
+        self.pending_hashes += 1
+        try:
+            return await loop.run_in_executor(self._hash_executor, self.verify_password, password, hashed)
+        finally:
+            self.pending_hashes -= 1
+    
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when a stored hash was made with a different cost than BCRYPT_ROUNDS"""
+        try:
+            # bcrypt hashes look like $2b$12$<salt+hash>
+            return int(hashed.split('$')[2]) != self.bcrypt_rounds
+        except (IndexError, ValueError):
+            return False
+    
     async def register_user(self, email: str, password: str, name: str) -> Dict:
         """Register a new user"""
         try:
@@ -44,7 +85,7 @@ class SimpleAuthService:
                 raise HTTPException(status_code=400, detail="Email already registered")
             
             # Hash password
-            hashed_password = self.hash_password(password)
+            hashed_password = await self.hash_password_async(password)
             
             # Create user
             user_doc = {
@@ -73,14 +114,17 @@ class SimpleAuthService:
             
             await self.db.sessions.insert_one(session_doc)
             
+            user_profile = {
+                "id": user_doc["user_id"],
+                "email": email,
+                "name": name,
+                "picture": f"https://ui-avatars.com/api/?name={name}&background=10b981&color=fff"
+            }
+            self.session_cache.put(session_token, user_profile, expires_at)
+            
             return {
                 "session_token": session_token,
-                "user": {
-                    "id": user_doc["user_id"],
-                    "email": email,
-                    "name": name,
-                    "picture": f"https://ui-avatars.com/api/?name={name}&background=10b981&color=fff"
-                }
+                "user": user_profile
             }
             
         except HTTPException:
@@ -98,9 +142,20 @@ class SimpleAuthService:
                 raise HTTPException(status_code=401, detail="Invalid email or password")
             
             # Verify password
-            if not self.verify_password(password, user["password_hash"]):
+            if not await self.verify_password_async(password, user["password_hash"]):
                 raise HTTPException(status_code=401, detail="Invalid email or password")
             
+            # Upgrade (or downgrade) the stored hash to the configured cost
+            if self.needs_rehash(user["password_hash"]):
+                try:
+                    new_hash = await self.hash_password_async(password)
+                    await self.db.users.update_one(
+                        {"user_id": user["user_id"]},
+                        {"$set": {"password_hash": new_hash}}
+                    )
+                except Exception as e:
+                    logger.error(f"Password rehash error: {str(e)}")
+            
             # Create session
             session_token = secrets.token_urlsafe(32)
             expires_at = datetime.now(timezone.utc) + timedelta(days=7)
@@ -116,14 +171,17 @@ class SimpleAuthService:
             
             await self.db.sessions.insert_one(session_doc)
             
+            user_profile = {
+                "id": user["user_id"],
+                "email": user["email"],
+                "name": user["name"],
+                "picture": f"https://ui-avatars.com/api/?name={user['name']}&background=10b981&color=fff"
+            }
+            self.session_cache.put(session_token, user_profile, expires_at)
+            
             return {
                 "session_token": session_token,
-                "user": {
-                    "id": user["user_id"],
-                    "email": user["email"],
-                    "name": user["name"],
-                    "picture": f"https://ui-avatars.com/api/?name={user['name']}&background=10b981&color=fff"
-                }
+                "user": user_profile
             }
             
         except HTTPException:
@@ -147,21 +205,31 @@ class SimpleAuthService:
             if not session_token:
                 return None
             
+            cached = self.session_cache.get(session_token)
+            if cached is MISSING:
+                return None
+            if cached is not None:
+                return cached
+            
             # Find valid session
-            session = await self.db.sessions.find_one({
-                "session_token": session_token,
-                "expires_at": {"$gt": datetime.now(timezone.utc)}
-            })
+            with span("session_lookup"):
+                session = await self.db.sessions.find_one({
+                    "session_token": session_token,
+                    "expires_at": {"$gt": datetime.now(timezone.utc)}
+                })
             
             if not session:
+                self.session_cache.put_missing(session_token)
                 return None
             
-            return {
+            user_profile = {
                 "id": session["user_id"],
                 "email": session["email"],
                 "name": session["name"],
                 "picture": f"https://ui-avatars.com/api/?name={session['name']}&background=10b981&color=fff"
             }
+            self.session_cache.put(session_token, user_profile, session["expires_at"])
+            return user_profile
             
         except Exception as e:
             logger.error(f"Get current user error: {str(e)}")
@@ -189,8 +257,11 @@ class SimpleAuthService:
                     session_token = auth_header.split(" ")[1]
             
             if session_token:
-                # Delete session from database
+                # Delete session from database; a lookup that read the session while the
+                # delete was in flight may have cached it again, so invalidate afterwards too
+                self.session_cache.invalidate(session_token)
                 await self.db.sessions.delete_one({"session_token": session_token})
+                self.session_cache.invalidate(session_token)
             
             # Clear cookie
             response.delete_cookie(
@@ -0,0 +1,33 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as its own task; callers arriving while it
+    is in flight await the same task. Each caller receives its own deep copy of the result,
+    so callers can mutate what they get back. Cancelling one caller never cancels the
+    shared work for the others.
+    """
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"executions": 0, "coalesced": 0}
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
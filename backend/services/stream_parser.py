@@ -0,0 +1,271 @@
+import json
+import logging
+import re
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A line that opens or closes a markdown code block, e.g. ```json
+CODE_FENCE = re.compile(r"^[ \t]*```[\w-]*[ \t]*$", re.MULTILINE)
+
+# How many cut points to try when salvaging truncated JSON, newest first
+MAX_TRUNCATION_CUTS = 20
+
+class RepairStats:
+    """
+    What it took to turn model output into careers: repair counts keyed by
+    (field, repair), and how many careers were clean, repaired or dropped
+    """
+    def __init__(self):
+        self.repairs: Dict[Tuple[str, str], int] = {}
+        self.careers = {"clean": 0, "repaired": 0, "dropped": 0}
+    
+    def record(self, field: str, repair: str):
+        key = (field, repair)
+        self.repairs[key] = self.repairs.get(key, 0) + 1
+
+def strip_code_fences(text: str) -> str:
+    """Remove markdown code fence lines around or between JSON blocks"""
+    return CODE_FENCE.sub("", text)
+
+def _scan(text: str) -> Tuple[str, List[Tuple[int, str]], str, List[str]]:
+    """
+    One string-aware pass over the first JSON value in text. Drops trailing commas,
+    turns curly quotes used as string delimiters into plain ones and stops at the end
+    of the value. Returns the cleaned text, the (offset, closers) of every comma so a
+    truncated value can be cut back to its last complete member, the closers the
+    value still needs, and the repairs made.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    repairs: List[str] = []
+    in_string = False
+    curly_string = False
+    escaped = False
+    
+    for i, ch in enumerate(text):
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"' or (curly_string and ch == '”'):
+                out[-1] = '"'
+                in_string = False
+            continue
+        
+        if ch in ('"', '“', '”'):
+            if ch != '"' and "smart_quotes" not in repairs:
+                repairs.append("smart_quotes")
+            curly_string = ch != '"'
+            in_string = True
+            out.append('"')
+        elif ch in '}]':
+            end = len(out) - 1
+            while end >= 0 and out[end].isspace():
+                end -= 1
+            if end >= 0 and out[end] == ',':
+                del out[end]
+                if "trailing_comma" not in repairs:
+                    repairs.append("trailing_comma")
+            if stack and stack[-1] == ch:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                if text[i + 1:].strip():
+                    repairs.append("trailing_text")
+                break
+        else:
+            if ch == '{':
+                stack.append('}')
+            elif ch == '[':
+                stack.append(']')
+            elif ch == ',' and stack:
+                cuts.append((len(out), "".join(reversed(stack))))
+            out.append(ch)
+    
+    closers = ('"' if in_string else "") + "".join(reversed(stack))
+    return "".join(out), cuts, closers, repairs
+
+def _loads(text: str) -> Tuple[Any, bool]:
+    """json.loads that also accepts raw control characters (e.g. newlines) inside strings"""
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        return json.loads(text, strict=False), True
+
+def repair_json(raw: str) -> Tuple[Any, List[str]]:
+    """
+    Decode the first JSON value in model output, repairing what models commonly get
+    wrong: code fences and prose around the JSON, trailing commas, curly quotes, raw
+    newlines in strings, and output truncated mid-value (cut back to the last complete
+    member; a string cut off part-way is dropped, never closed as it stands). Returns
+    the value and the repairs made, "truncated" among them if anything was cut; raises
+    ValueError if nothing can be recovered.
+    """
+    try:
+        return json.loads(raw), []
+    except json.JSONDecodeError:
+        pass
+    
+    repairs = []
+    text = strip_code_fences(raw)
+    if text != raw:
+        repairs.append("code_fence")
+    starts = [index for index in (text.find('['), text.find('{')) if index != -1]
+    if not starts:
+        raise ValueError("No JSON found in response")
+    if text[:min(starts)].strip():
+        repairs.append("leading_text")
+    
+    cleaned, cuts, closers, scan_repairs = _scan(text[min(starts):])
+    repairs += scan_repairs
+    
+    candidates = []
+    if not closers.startswith('"'):
+        # Closing the open arrays and objects loses nothing; closing a half-written string would
+        candidates.append((cleaned + closers, bool(closers)))
+    candidates += [(cleaned[:offset] + cut_closers, True) for offset, cut_closers in reversed(cuts[-MAX_TRUNCATION_CUTS:])]
+    for candidate, truncated in candidates:
+        try:
+            value, control_characters = _loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if control_characters:
+            repairs.append("control_characters")
+        if truncated:
+            repairs.append("truncated")
+        return value, repairs
+    raise ValueError("Could not repair JSON in response")
+
+class IncrementalCareerParser:
+    """
+    Pulls complete career objects out of a streamed JSON array as text arrives.
+    
+    Text before the opening '[' (such as a ```json fence) is skipped, and output that is a
+    bare object rather than an array is accepted too. Each top-level object is decoded as
+    soon as its closing brace arrives, so callers can act on the first career long before
+    the model finishes the array. Braces inside strings are ignored. Malformed objects go
+    through repair_json, and close() salvages an object cut off when the output ends.
+    Careers recovered from cut-off output are reported by was_truncated(), and truncated
+    is set once anything was cut off, so callers can avoid caching partial results.
+    """
+    def __init__(self, stats: Optional[RepairStats] = None):
+        self.stats = stats if stats is not None else RepairStats()
+        self._buffer = ""
+        self._scan_pos = 0
+        self._in_array = False
+        self._objects = 0
+        self._depth = 0
+        self._object_start = -1
+        self._in_string = False
+        self._escaped = False
+        self._truncated_ids = set()
+        self.finished = False
+        self.truncated = False
+    
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add a chunk of model output and return any careers it completed"""
+        if self.finished or not text:
+            return []
+        
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        
+        i = self._scan_pos
+        while i < len(buffer):
+            ch = buffer[i]
+            
+            if not self._in_array:
+                if ch == '[':
+                    self._in_array = True
+                    i += 1
+                    continue
+                if ch != '{':
+                    i += 1
+                    continue
+                # A bare object: treat the output as a one-element array
+                self._in_array = True
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch == '{':
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif ch == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._decode(buffer[self._object_start:i + 1]))
+                    self._object_start = -1
+            elif ch == ']' and self._depth == 0:
+                if self._objects:
+                    self.finished = True
+                    i += 1
+                    break
+                # A bracket in prose before the real array, e.g. "[2 careers]"
+                self._in_array = False
+            i += 1
+        
+        # Drop text that can no longer contribute to an object
+        if self._object_start >= 0:
+            self._buffer = buffer[self._object_start:]
+            self._scan_pos = i - self._object_start
+            self._object_start = 0
+        else:
+            self._buffer = ""
+            self._scan_pos = 0
+        
+        return completed
+    
+    def close(self) -> List[Dict[str, Any]]:
+        """Call when the output has ended; returns what can be salvaged of an unfinished object"""
+        if self.finished or self._object_start < 0:
+            self.finished = True
+            return []
+        self.finished = True
+        # Whatever is left was cut off by the end of the output
+        self.truncated = True
+        return self._decode(self._buffer[self._object_start:])
+    
+    def was_truncated(self, career: Dict[str, Any]) -> bool:
+        """True if this career (as returned by feed or close) was recovered from cut-off output"""
+        return id(career) in self._truncated_ids
+    
+    def _decode(self, raw: str) -> List[Dict[str, Any]]:
+        self._objects += 1
+        try:
+            value, repairs = repair_json(raw)
+        except ValueError as e:
+            logger.warning(f"Skipping malformed career object: {str(e)}")
+            self.stats.record("json", "unrecoverable")
+            self.stats.careers["dropped"] += 1
+            return []
+        for repair in repairs:
+            self.stats.record("json", repair)
+        
+        careers = [value]
+        # Unwrap {"careers": [...]} style wrappers around the array
+        if isinstance(value, dict) and "title" not in value:
+            for nested in value.values():
+                if isinstance(nested, list) and nested and all(isinstance(item, dict) for item in nested):
+                    self.stats.record("json", "unwrapped")
+                    careers = nested
+                    break
+        
+        if "truncated" in repairs:
+            # Only the last career can have been cut off
+            self.truncated = True
+            self._truncated_ids.add(id(careers[-1]))
+        return careers
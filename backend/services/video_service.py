@@ -1,5 +1,3 @@
-import google.generativeai as genai
-import os
 import logging
 from typing import Optional
 
@@ -7,12 +5,9 @@ logger = logging.getLogger(__name__)
 
 class VideoService:
     def __init__(self):
-        # Configure Gemini API for video generation
-        api_key = os.environ.get('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-        
-        genai.configure(api_key=api_key)
+        # Videos are curated placeholders for now, so no model client is needed until
+        # Veo generation is wired in
+        pass
         
     def generate_career_video(self, career_title: str) -> Optional[str]:
         """
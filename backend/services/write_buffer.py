@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo.errors import BulkWriteError
+from .metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Mongo error code for a duplicate key: the document was written by an earlier attempt
+DUPLICATE_KEY = 11000
+
+class WriteBehindBuffer:
+    """
+    Batches fire-and-forget inserts and writes them with insert_many.
+
+    add() queues a document and returns without waiting on Mongo. The buffer is flushed
+    when WRITE_BUFFER_MAX_BATCH documents are waiting or every
+    WRITE_BUFFER_FLUSH_INTERVAL seconds, whichever comes first, and on shutdown. Once
+    WRITE_BUFFER_MAX_BACKLOG documents are waiting, add() flushes inline so memory stays
+    bounded when Mongo falls behind. Documents whose insert fails go back on the buffer
+    and are retried up to WRITE_BUFFER_MAX_RETRIES times, WRITE_BUFFER_RETRY_BACKOFF
+    seconds after the first failure and twice as long after each one after that, so a
+    short Mongo outage is ridden out rather than used up in consecutive flushes.
+    """
+    def __init__(self, db, max_batch: Optional[int] = None, flush_interval: Optional[float] = None, max_backlog: Optional[int] = None,
+                 max_retries: Optional[int] = None, retry_backoff: Optional[float] = None):
+        self.db = db
+        self.max_batch = max_batch or int(os.environ.get('WRITE_BUFFER_MAX_BATCH', '100'))
+        self.flush_interval = flush_interval or float(os.environ.get('WRITE_BUFFER_FLUSH_INTERVAL', '0.5'))
+        self.max_backlog = max_backlog or int(os.environ.get('WRITE_BUFFER_MAX_BACKLOG', '10000'))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get('WRITE_BUFFER_MAX_RETRIES', '3'))
+        self.retry_backoff = retry_backoff if retry_backoff is not None else float(os.environ.get('WRITE_BUFFER_RETRY_BACKOFF', '1'))
+        # (collection, document, failed attempts so far, monotonic time it may be written from)
+        self._pending: List[Tuple[str, Dict[str, Any], int, float]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"queued": 0, "written": 0, "retried": 0, "failed": 0, "flushes": 0}
+    
+    @property
+    def backlog(self) -> int:
+        return len(self._pending)
+    
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background flusher and write out everything still buffered"""
+        if self._task:
+            # Let the flusher finish any flush in progress rather than cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Failed documents are re-queued with one more attempt, so this ends after max_retries
+        # passes; waiting out the backoff keeps shutdown from spending them all at once
+        while self._pending:
+            await asyncio.sleep(max(0.0, min(entry[3] for entry in self._pending) - time.monotonic()))
+            await self.flush()
+    
+    async def add(self, collection: str, document: Dict[str, Any]):
+        """Queue a document for insertion into collection"""
+        self._pending.append((collection, document, 0, 0.0))
+        self.stats["queued"] += 1
+        
+        if len(self._pending) >= self.max_backlog or self._task is None:
+            # Backpressure (or no flusher running): write now rather than grow further
+            await self.flush()
+        elif len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+    
+    async def flush(self):
+        """Write all buffered documents that are not waiting to retry, one insert_many per collection"""
+        async with self._flush_lock:
+            now = time.monotonic()
+            batch = [entry for entry in self._pending if entry[3] <= now]
+            if not batch:
+                return
+            self._pending = [entry for entry in self._pending if entry[3] > now]
+            
+            by_collection: Dict[str, List[Tuple[Dict[str, Any], int]]] = {}
+            for collection, document, attempts, _ in batch:
+                by_collection.setdefault(collection, []).append((document, attempts))
+            
+            self.stats["flushes"] += 1
+            retry: List[Tuple[str, Dict[str, Any], int, float]] = []
+            for collection, entries in by_collection.items():
+                documents = [document for document, _ in entries]
+                try:
+                    with span("db_flush"):
+                        await self.db[collection].insert_many(documents, ordered=False)
+                    self.stats["written"] += len(documents)
+                    continue
+                except BulkWriteError as e:
+                    # ordered=False writes everything it can; only the reported indexes failed
+                    failed = {
+                        error["index"] for error in e.details.get("writeErrors", [])
+                        if error.get("code") != DUPLICATE_KEY
+                    }
+                    if not e.details.get("writeErrors"):
+                        failed = set(range(len(entries)))
+                    error = e
+                except Exception as e:
+                    failed = set(range(len(entries)))
+                    error = e
+                
+                self.stats["written"] += len(entries) - len(failed)
+                logger.error(f"Failed to write {len(failed)} buffered document(s) to {collection}: {str(error)}")
+                for index in sorted(failed):
+                    document, attempts = entries[index]
+                    retry_at = time.monotonic() + self.retry_backoff * 2 ** attempts
+                    retry.append((collection, document, attempts + 1, retry_at))
+            
+            if retry:
+                self._requeue(retry)
+    
+    def _requeue(self, entries: List[Tuple[str, Dict[str, Any], int, float]]):
+        """Put failed documents back at the front of the buffer, within the retry and backlog limits"""
+        keep = [entry for entry in entries if entry[2] <= self.max_retries]
+        room = max(0, self.max_backlog - len(self._pending))
+        keep = keep[:room]
+        self.stats["retried"] += len(keep)
+        self.stats["failed"] += len(entries) - len(keep)
+        self._pending[:0] = keep
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write buffer flush failed: {str(e)}")
@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND / "benchmarks"))
+
+@pytest.fixture(scope="session")
+def server():
+    """The API module wired to the in-memory database and the offline LLM provider"""
+    os.environ.update({
+        "MONGO_URL": "memory://",
+        "DB_NAME": "questly_test",
+        "LLM_PROVIDER": "offline",
+        "BCRYPT_ROUNDS": "4",
+        "ANALYSIS_JOB_STORE": "memory",
+        "RATE_LIMIT_ENABLED": "false",
+    })
+    # Stand-ins must be in place before server.py builds its clients and services
+    import motor.motor_asyncio
+    from memory_db import MemoryClient
+    motor.motor_asyncio.AsyncIOMotorClient = MemoryClient
+    
+    import server as server_module
+    return server_module
+
+@pytest.fixture(scope="session")
+def client(server):
+    # One app lifetime for the whole run: background tasks are bound to its event loop
+    from fastapi.testclient import TestClient
+    with TestClient(server.app) as test_client:
+        yield test_client
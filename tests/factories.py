@@ -0,0 +1,14 @@
+def make_career(title: str, **overrides) -> dict:
+    """A complete, valid career as the model should produce it"""
+    career = {
+        "title": title,
+        "persona": {"title": "Meet Your Future Self", "description": f"You're Lerato, a {title}."},
+        "dayInLife": {"title": "A Day in Your Life", "description": "Meetings, then hands-on work."},
+        "weekendQuest": {"title": "Your Weekend Quest", "description": "Try https://www.youtube.com/watch?v=rfscVS0vtbw"},
+        "realityCheck": {"title": "The Reality Check", "description": "Salaries typically range R300,000 - R600,000."},
+        "skills": ["Maths", "Patience"],
+        "timeToMastery": "4-6 years",
+        "averageSalary": "R300,000 - R600,000",
+    }
+    career.update(overrides)
+    return career
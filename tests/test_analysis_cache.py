@@ -0,0 +1,30 @@
+import asyncio
+from datetime import timedelta
+
+from memory_db import MemoryClient
+from services.analysis_cache import CareerAnalysisCache
+from services.db_schema import INDEX_SPECS
+
+from .factories import make_career
+
+def test_shared_entries_carry_their_expiry():
+    collection = MemoryClient()["analysis_cache_test"]["career_analyses"]
+    cache = CareerAnalysisCache(collection=collection, ttl_seconds=3600, max_entries=10)
+    
+    async def run():
+        await cache.set("key", [make_career("Nurse")], "I like helping people")
+        return await collection.find_one({"cache_key": "key"})
+    
+    doc = asyncio.run(run())
+    assert doc["expires_at"] - doc["timestamp"] == timedelta(seconds=3600)
+
+def test_only_cache_entries_are_expired_by_mongo():
+    ttl_indexes = [
+        spec["options"] for spec in INDEX_SPECS
+        if spec["collection"] == "career_analyses" and "expireAfterSeconds" in spec["options"]
+    ]
+    assert ttl_indexes == [{
+        "name": "cache_expires_at_ttl",
+        "expireAfterSeconds": 0,
+        "partialFilterExpression": {"cache_key": {"$exists": True}},
+    }]
@@ -0,0 +1,52 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from memory_db import MemoryClient
+from services.analysis_history import AnalysisHistoryService, decode_cursor, encode_cursor
+
+def test_cursor_round_trips():
+    timestamp = datetime(2025, 3, 14, 9, 26, 53, 589000)
+    object_id = ObjectId()
+    assert decode_cursor(encode_cursor(timestamp, object_id)) == (timestamp, object_id)
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 at all!",
+    base64.urlsafe_b64encode(b"no separator").decode(),
+    base64.urlsafe_b64encode(b"2025-03-14T09:26:53|not-an-object-id").decode(),
+    base64.urlsafe_b64encode(b"yesterday|" + str(ObjectId()).encode()).decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_pages_cover_every_analysis_once_even_with_equal_timestamps():
+    db = MemoryClient()["history_test"]
+    start = datetime(2025, 1, 1)
+    # Pairs of analyses share a timestamp, so paging must break ties on _id
+    docs = [
+        {"_id": ObjectId(), "user_id": "u1", "input": f"input {i}", "timestamp": start + timedelta(minutes=i // 2), "results": [{"title": f"Career {i}"}]}
+        for i in range(7)
+    ]
+    docs.append({"_id": ObjectId(), "user_id": "u2", "input": "someone else", "timestamp": start, "results": []})
+    
+    async def walk():
+        await db.career_analyses.insert_many(docs)
+        history = AnalysisHistoryService(db)
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = await history.list_for_user("u1", cursor=cursor, limit=3)
+            seen += [item["input"] for item in page["analyses"]]
+            pages += 1
+            cursor = page["nextCursor"]
+            if cursor is None:
+                return seen, pages
+    
+    seen, pages = asyncio.run(walk())
+    expected = [doc["input"] for doc in sorted(docs[:7], key=lambda doc: (doc["timestamp"], doc["_id"]), reverse=True)]
+    assert seen == expected
+    assert pages == 3
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from services.analysis_jobs import JOB_COMPLETED, JOB_PENDING, JOB_RUNNING, AnalysisJobQueue, InMemoryJobStore
+
+def test_a_job_queued_on_two_workers_runs_once():
+    store = InMemoryJobStore()
+    runs = []
+    
+    async def handler(job):
+        runs.append(job["job_id"])
+        await asyncio.sleep(0.05)
+        return {"careerPaths": []}
+    
+    async def run():
+        first = AnalysisJobQueue(store, handler, workers=2, lease_seconds=30)
+        second = AnalysisJobQueue(store, handler, workers=2, lease_seconds=30)
+        await first.start()
+        await second.start()
+        job = await first.submit({"input": "I like maths"})
+        # As if the second process had found the same job
+        second._queue.put_nowait(job["job_id"])
+        await asyncio.sleep(0.2)
+        await first.stop()
+        await second.stop()
+        return await store.get(job["job_id"])
+    
+    job = asyncio.run(run())
+    assert runs == [job["job_id"]]
+    assert job["status"] == JOB_COMPLETED
+    assert job["expires_at"] > datetime.now(timezone.utc)
+
+def test_claims_respect_leases():
+    store = InMemoryJobStore()
+    now = datetime.now(timezone.utc)
+    
+    async def run():
+        await store.create({"job_id": "j1", "status": JOB_PENDING, "updated_at": now})
+        claimed = await store.claim("j1", "worker-a", now + timedelta(seconds=60), now)
+        stolen = await store.claim("j1", "worker-b", now + timedelta(seconds=60), now)
+        later = now + timedelta(seconds=61)
+        # worker-a's process died; its lease runs out and the job is up for grabs again
+        stale = await store.stale(later - timedelta(seconds=60), later)
+        recovered = await store.claim("j1", "worker-b", later + timedelta(seconds=60), later)
+        return claimed, stolen, stale, recovered
+    
+    claimed, stolen, stale, recovered = asyncio.run(run())
+    assert claimed["owner"] == "worker-a" and claimed["status"] == JOB_RUNNING
+    assert stolen is None
+    assert [job["job_id"] for job in stale] == ["j1"]
+    assert recovered["owner"] == "worker-b"
@@ -0,0 +1,45 @@
+import json
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+def test_every_index_gets_exactly_one_line(client):
+    inputs = [
+        "I love Coding and maths",
+        "i love coding and maths!",
+        "hi",
+        "Biology and helping people in hospitals",
+        "I love Coding and maths",
+    ]
+    response = client.post("/api/analyze-career/batch", json={"requests": [{"userInput": text} for text in inputs]})
+    
+    assert response.status_code == 200
+    lines = _lines(response)
+    summary = lines[-1]
+    per_index = [line for line in lines if "index" in line]
+    
+    assert sorted(line["index"] for line in per_index) == list(range(len(inputs)))
+    assert summary["done"] is True
+    assert summary["total"] == len(inputs)
+    assert summary["unique"] == 2
+    
+    by_index = {line["index"]: line for line in per_index}
+    assert "error" in by_index[2]
+    # Spellings that normalize to the same analysis share its careers
+    assert by_index[0]["careerPaths"] == by_index[1]["careerPaths"] == by_index[4]["careerPaths"]
+    assert by_index[3]["careerPaths"]
+
+def test_misses_are_packed_into_fewer_generations(client):
+    inputs = [f"I enjoy subject number {number} and want a career in it" for number in range(6)]
+    response = client.post("/api/analyze-career/batch", json={"requests": [{"userInput": text} for text in inputs]})
+    
+    lines = _lines(response)
+    summary = lines[-1]
+    assert sorted(line["index"] for line in lines if "careerPaths" in line) == list(range(len(inputs)))
+    assert summary["unique"] == len(inputs)
+    assert 0 < summary["modelCalls"] < len(inputs)
+
+def test_rejects_oversized_batches(client, server):
+    requests = [{"userInput": "I love coding and maths"}] * (server.BATCH_ANALYSIS_MAX_INPUTS + 1)
+    response = client.post("/api/analyze-career/batch", json={"requests": requests})
+    assert response.status_code == 400
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from memory_db import MemoryClient
+from services.career_profiles import CareerProfileStore
+
+from .factories import make_career
+
+def _analyses(*title_lists, cache_titles=()):
+    collection = MemoryClient()["career_profiles_test"]["career_analyses"]
+    start = datetime.now(timezone.utc)
+    
+    async def fill():
+        for number, titles in enumerate(title_lists):
+            await collection.insert_one({
+                "user_id": "u1",
+                "results": [make_career(title) for title in titles],
+                "timestamp": start - timedelta(minutes=number),
+            })
+        # A shared cache entry in the same collection
+        await collection.insert_one({"cache_key": "k", "results": [make_career(title) for title in cache_titles], "timestamp": start})
+    
+    asyncio.run(fill())
+    return collection
+
+def test_popular_titles_count_analyses_but_not_cache_entries():
+    collection = _analyses(
+        ["Nurse", "Pilot"], ["nurses", "Data Scientist"], ["Nurse"],
+        cache_titles=["Chef", "Chef"],
+    )
+    store = CareerProfileStore(collection, top_n=2, refresh_seconds=3600, sample_size=100)
+    
+    assert asyncio.run(store.popular_titles()) == ["Nurse", "Pilot"]
+
+def test_failed_render_keeps_the_previous_profile():
+    collection = _analyses(["Nurse", "Pilot"])
+    store = CareerProfileStore(collection, top_n=2, refresh_seconds=3600, sample_size=100)
+    failing = set()
+    
+    async def render(title):
+        if title in failing:
+            raise ValueError("output was cut off")
+        return make_career(title, averageSalary=f"{len(failing)} failing")
+    
+    asyncio.run(store.refresh(render))
+    failing.update({"Nurse", "Pilot"})
+    asyncio.run(store.refresh(render))
+    
+    assert store.get("Nurse")["averageSalary"] == "0 failing"
+    assert len(store) == 2
+    assert store.stats["failed"] == 2
+    # Callers get copies they are free to change
+    store.get("Pilot")["title"] = "Astronaut"
+    assert store.get("Pilot")["title"] == "Pilot"
@@ -0,0 +1,74 @@
+import pytest
+
+from services.career_schema import normalize_career
+from services.stream_parser import RepairStats
+
+from .factories import make_career
+
+def test_clean_career_passes_through():
+    stats = RepairStats()
+    career = normalize_career(make_career("Nurse", id="nurse-1"), stats)
+    assert career["title"] == "Nurse"
+    assert career["id"] == "nurse-1"
+    assert stats.careers == {"clean": 1, "repaired": 0, "dropped": 0}
+
+def test_shapes_models_commonly_get_wrong_are_repaired():
+    stats = RepairStats()
+    raw = make_career(
+        "Pilot",
+        persona="You're Sipho, a pilot.",
+        dayInLife={"description": "Pre-flight checks."},
+        skills="Navigation, Calm , ",
+        timeToMastery=3,
+        averageSalary="$50,000",
+    )
+    del raw["weekendQuest"]["title"]
+    career = normalize_career(raw, stats)
+    
+    assert career["id"]
+    assert career["persona"] == {"title": "Meet Your Future Self", "description": "You're Sipho, a pilot."}
+    assert career["dayInLife"]["title"] == "A Day in Your Life"
+    assert career["weekendQuest"]["title"] == "Your Weekend Quest"
+    assert career["skills"] == ["Navigation", "Calm"]
+    assert career["timeToMastery"] == "3"
+    assert career["averageSalary"] == "R 50,000"
+    assert stats.careers["repaired"] == 1
+    assert stats.repairs[("skills", "split")] == 1
+
+def test_missing_details_are_defaulted_on_complete_output():
+    raw = make_career("Pilot")
+    for field in ("skills", "timeToMastery", "averageSalary"):
+        del raw[field]
+    career = normalize_career(raw)
+    assert career["skills"] == []
+    assert career["timeToMastery"] == career["averageSalary"] == "Varies"
+
+@pytest.mark.parametrize("field", ["skills", "timeToMastery", "averageSalary"])
+def test_truncated_careers_get_no_defaults(field):
+    raw = make_career("Pilot")
+    del raw[field]
+    stats = RepairStats()
+    with pytest.raises(ValueError):
+        normalize_career(raw, stats, truncated=True)
+    assert stats.careers["dropped"] == 1
+
+def test_truncated_career_with_an_emptied_skills_list_is_dropped():
+    with pytest.raises(ValueError):
+        normalize_career(make_career("Pilot", skills=[]), truncated=True)
+
+def test_complete_truncated_career_is_kept_and_counted():
+    stats = RepairStats()
+    normalize_career(make_career("Pilot"), stats, truncated=True)
+    assert stats.careers["repaired"] == 1
+    assert stats.repairs[("career", "truncated")] == 1
+
+def test_unusable_careers_are_rejected():
+    stats = RepairStats()
+    with pytest.raises(ValueError):
+        normalize_career(["not", "a", "career"], stats)
+    raw = make_career("Pilot")
+    del raw["realityCheck"]
+    with pytest.raises(ValueError):
+        normalize_career(raw, stats)
+    assert stats.careers["dropped"] == 2
+    assert stats.repairs[("realityCheck", "invalid")] == 1
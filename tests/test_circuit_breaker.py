@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.circuit_breaker.time.monotonic", lambda: now[0])
+    return now
+
+def _breaker(**overrides):
+    settings = {"failure_ratio": 0.5, "min_calls": 4, "window_seconds": 60, "open_seconds": 30, "slow_call_seconds": 5}
+    settings.update(overrides)
+    return CircuitBreaker("test", **settings)
+
+async def _succeed():
+    return "ok"
+
+async def _fail():
+    raise RuntimeError("provider down")
+
+def _run(breaker, fn):
+    try:
+        return asyncio.run(breaker.call(fn))
+    except RuntimeError:
+        return None
+
+def test_opens_once_failure_ratio_is_reached(clock):
+    breaker = _breaker()
+    for fn in (_succeed, _succeed, _fail):
+        _run(breaker, fn)
+    assert breaker.state == CLOSED
+    _run(breaker, _fail)
+    assert breaker.state == OPEN
+    
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.snapshot()["rejected"] == 1
+
+def test_needs_min_calls_before_opening(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _run(breaker, _fail)
+    assert breaker.state == CLOSED
+
+def test_old_calls_fall_out_of_the_window(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _run(breaker, _fail)
+    clock[0] += 61
+    _run(breaker, _fail)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 1
+
+def test_successful_probe_closes_and_failed_probe_reopens(clock):
+    breaker = _breaker(min_calls=1)
+    _run(breaker, _fail)
+    assert breaker.state == OPEN
+    
+    clock[0] += 31
+    _run(breaker, _fail)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["opened"] == 2
+    
+    clock[0] += 31
+    assert _run(breaker, _succeed) == "ok"
+    assert breaker.state == CLOSED
+
+def test_only_one_probe_at_a_time(clock):
+    breaker = _breaker(min_calls=1)
+    _run(breaker, _fail)
+    clock[0] += 31
+    
+    async def probe_and_race():
+        async with breaker.guard():
+            assert breaker.state == HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.check()
+    asyncio.run(probe_and_race())
+    assert breaker.state == CLOSED
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = _breaker(min_calls=1)
+    
+    async def slow():
+        async with breaker.guard():
+            clock[0] += 6
+    asyncio.run(slow())
+    assert breaker.state == OPEN
+
+def test_reported_latency_replaces_wall_time(clock):
+    breaker = _breaker(min_calls=1)
+    
+    async def slow_client_fast_provider():
+        async with breaker.guard() as call:
+            clock[0] += 60
+            call.latency = 0.5
+    asyncio.run(slow_client_fast_provider())
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["p50_latency_seconds"] == 0.5
+
+def test_cancellation_is_not_a_provider_failure(clock):
+    breaker = _breaker(min_calls=1)
+    
+    async def cancelled():
+        async with breaker.guard():
+            raise asyncio.CancelledError()
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancelled())
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
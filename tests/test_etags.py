@@ -0,0 +1,45 @@
+import time
+import uuid
+
+def _sign_in(client):
+    email = f"student-{uuid.uuid4().hex[:8]}@school.example"
+    client.post("/api/auth/register", json={"email": email, "password": "matric2025", "name": "Student"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "matric2025"}).json()["session_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _saved_analysis_id(client, headers):
+    client.post("/api/analyze-career", json={"userInput": "I love coding and building robots"}, headers=headers)
+    # History is written through the write-behind buffer
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        analyses = client.get("/api/me/analyses", headers=headers).json()["analyses"]
+        if analyses:
+            return analyses[0]["id"]
+        time.sleep(0.1)
+    raise AssertionError("analysis was never saved")
+
+def test_compressed_responses_get_their_own_strong_etag(client):
+    headers = _sign_in(client)
+    path = f"/api/me/analyses/{_saved_analysis_id(client, headers)}"
+    
+    plain = client.get(path, headers={**headers, "Accept-Encoding": "identity"})
+    gzipped = client.get(path, headers={**headers, "Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert gzipped.json() == plain.json()
+
+def test_revalidation_echoes_the_tag_the_client_holds(client):
+    headers = _sign_in(client)
+    path = f"/api/me/analyses/{_saved_analysis_id(client, headers)}"
+    gzip_etag = client.get(path, headers={**headers, "Accept-Encoding": "gzip"}).headers["etag"]
+    plain_etag = client.get(path, headers={**headers, "Accept-Encoding": "identity"}).headers["etag"]
+    
+    revalidated = client.get(path, headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzip_etag
+    
+    revalidated = client.get(path, headers={**headers, "Accept-Encoding": "identity", "If-None-Match": plain_etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == plain_etag
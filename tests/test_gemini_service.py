@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from services.analysis_cache import CareerAnalysisCache
+from services.gemini_service import GeminiService
+from services.llm_providers import LLMProvider, OfflineProvider
+
+from .factories import make_career
+
+class ScriptedProvider(LLMProvider):
+    """Returns the same text for every prompt and counts calls"""
+    name = "scripted"
+    model_name = "scripted-v1"
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+    
+    async def generate(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        self.calls += 1
+        return self.text
+
+def _service(text: str) -> GeminiService:
+    return GeminiService(cache=CareerAnalysisCache(), provider=ScriptedProvider(text))
+
+def _analyze_twice(service: GeminiService, user_input: str):
+    async def run():
+        first = await service.analyze_career_interests_async(user_input)
+        second = await service.analyze_career_interests_async(user_input)
+        return first, second
+    return asyncio.run(run())
+
+def test_complete_analyses_are_cached():
+    service = _service(json.dumps([make_career("Nurse"), make_career("Pilot")]))
+    first, second = _analyze_twice(service, "I like helping people and flying")
+    
+    assert [career["title"] for career in first] == ["Nurse", "Pilot"]
+    assert second == first
+    assert service.provider.calls == 1
+
+def test_analyses_salvaged_from_cut_off_output_are_not_cached():
+    full = json.dumps([make_career("Nurse"), make_career("Pilot")])
+    cut = full[:full.rindex("Salaries typically") + len("Salaries typically ")]
+    service = _service(cut)
+    first, _ = _analyze_twice(service, "I like helping people and flying")
+    
+    # The cut-off career is dropped rather than served with a half-written reality check
+    assert [career["title"] for career in first] == ["Nurse"]
+    assert service.provider.calls == 2
+
+def test_analyses_with_a_dropped_career_are_not_cached():
+    broken = make_career("Pilot")
+    del broken["persona"], broken["dayInLife"]
+    service = _service(json.dumps([make_career("Nurse"), broken]))
+    first, _ = _analyze_twice(service, "I like helping people and flying")
+    
+    assert [career["title"] for career in first] == ["Nurse"]
+    assert service.provider.calls == 2
+
+class SlowCareerProvider(ScriptedProvider):
+    """Lists two careers, then takes longer than any deadline to write the slow one"""
+    def __init__(self, slow_title: str):
+        super().__init__(json.dumps(["Nurse", slow_title]))
+        self.slow_title = slow_title
+    
+    async def generate(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        self.calls += 1
+        if "choose 2 career paths" in prompt:
+            return self.text
+        if f"analysis for a {self.slow_title}" in prompt:
+            await asyncio.sleep(5)
+            return json.dumps(make_career(self.slow_title))
+        return json.dumps(make_career("Nurse"))
+
+def test_parallel_analyses_missing_the_deadline_are_not_cached(monkeypatch):
+    monkeypatch.setenv("CAREER_ANALYSIS_MODE", "parallel")
+    monkeypatch.setenv("CAREER_ANALYSIS_DEADLINE_SECONDS", "0.1")
+    service = GeminiService(cache=CareerAnalysisCache(), provider=SlowCareerProvider("Pilot"))
+    service.semantic_index = None
+    first, _ = _analyze_twice(service, "I like helping people and flying")
+    
+    assert [career["title"] for career in first] == ["Nurse"]
+    # The short analysis was not cached, so the second request generated all three calls again
+    assert service.provider.calls == 6
+
+class PackingProvider(OfflineProvider):
+    """Offline provider whose packed responses leave out one student"""
+    def __init__(self, skip_student: str):
+        super().__init__(latency_ms=0, jitter_ms=0, error_rate=0)
+        self.skip_student = skip_student
+        self.prompts = []
+    
+    async def generate(self, prompt: str, max_output_tokens: int = 6000) -> str:
+        self.prompts.append(prompt)
+        text = await super().generate(prompt, max_output_tokens)
+        if "mapping each student number" in prompt:
+            packed = json.loads(text.strip("`").removeprefix("json"))
+            packed.pop(self.skip_student, None)
+            text = json.dumps(packed)
+        return text
+
+def _batch(service: GeminiService, inputs):
+    async def run():
+        return [item async for item in service.analyze_career_interests_batch(inputs)]
+    return asyncio.run(run())
+
+def test_batch_dedupes_packs_and_falls_back_for_missing_students(monkeypatch):
+    monkeypatch.setenv("BATCH_ANALYSIS_PACK_SIZE", "2")
+    service = GeminiService(cache=CareerAnalysisCache(), provider=PackingProvider(skip_student="2"))
+    service.semantic_index = None
+    inputs = ["I like plants and soil", "i like PLANTS and soil!", "I like ships", "I like drawing buildings", "I like rocks"]
+    
+    results = _batch(service, inputs)
+    
+    keys = [key for key, _, _ in results]
+    assert len(keys) == len(set(keys)) == 4
+    assert all(careers for _, _, careers in results)
+    packed = [prompt for prompt in service.provider.prompts if "mapping each student number" in prompt]
+    # Two packs of two, plus one individual analysis for the student each pack left out
+    assert len(packed) == 2
+    assert len(service.provider.prompts) == 4
+
+def test_batch_serves_cached_inputs_without_generating():
+    service = GeminiService(cache=CareerAnalysisCache(), provider=PackingProvider(skip_student=""))
+    _batch(service, ["I like plants and soil"])
+    calls = len(service.provider.prompts)
+    
+    results = _batch(service, ["I like plants and soil"])
+    assert len(results) == 1
+    assert len(service.provider.prompts) == calls
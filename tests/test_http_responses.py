@@ -0,0 +1,73 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from services.http_responses import CompressionMiddleware
+
+from .factories import make_career
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    
+    @app.get("/text")
+    def text(size: int):
+        return PlainTextResponse("a" * size)
+    
+    @app.get("/events")
+    def events():
+        async def chunks():
+            for number in range(3):
+                yield f"data: {'x' * 100}{number}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+    
+    @app.get("/ndjson")
+    def ndjson():
+        async def chunks():
+            for number in range(3):
+                yield f'{{"n": {number}, "pad": "{"x" * 100}"}}\n'
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+    
+    return TestClient(app)
+
+def test_only_bodies_over_the_minimum_size_are_gzipped():
+    client = _app()
+    small = client.get("/text", params={"size": 99}, headers={"Accept-Encoding": "gzip"})
+    large = client.get("/text", params={"size": 5000}, headers={"Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in small.headers
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < 5000
+    assert "Accept-Encoding" in large.headers["vary"]
+    assert large.text == "a" * 5000
+
+def test_clients_without_gzip_get_the_plain_body():
+    large = _app().get("/text", params={"size": 5000}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in large.headers
+    assert len(large.content) == 5000
+
+def test_streams_pass_through_uncompressed():
+    client = _app()
+    for path in ("/events", "/ndjson"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers, path
+        assert len(response.text.splitlines()) >= 3
+
+def test_compact_shape_sends_shared_blocks_once(server):
+    aps = "**APS (Admission Point Score) System:** ..."
+    content = {"careerPaths": [
+        make_career("Nurse", apsExplanation=aps, imageUrl=None),
+        make_career("Pilot", apsExplanation=aps, imageUrl=None),
+    ]}
+    compact = server._compact_career_content(content)
+    
+    assert compact["shared"] == {"apsExplanation": aps}
+    assert all("apsExplanation" not in career and "imageUrl" not in career for career in compact["careerPaths"])
+    assert [career["title"] for career in compact["careerPaths"]] == ["Nurse", "Pilot"]
+
+def test_compact_shape_keeps_blocks_that_differ(server):
+    content = {"careerPaths": [make_career("Nurse", apsExplanation="one"), make_career("Pilot", apsExplanation="two")]}
+    compact = server._compact_career_content(content)
+    
+    assert compact["shared"] == {}
+    assert [career["apsExplanation"] for career in compact["careerPaths"]] == ["one", "two"]
@@ -0,0 +1,60 @@
+from services.rate_limiter import RateLimitPolicy, TokenBucketLimiter
+
+def test_bucket_allows_burst_then_limits():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=3)
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = limiter.acquire("a")
+    assert 0 < retry_after <= 1.0
+    # Other keys have their own bucket
+    assert limiter.acquire("b") == 0.0
+
+def test_bucket_refills_over_time(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("services.rate_limiter.time.monotonic", lambda: clock[0])
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=2)
+    limiter.acquire("a")
+    limiter.acquire("a")
+    assert limiter.acquire("a") > 0
+    clock[0] += 1.0
+    assert limiter.acquire("a") == 0.0
+
+def test_costly_request_leaves_bucket_in_debt(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("services.rate_limiter.time.monotonic", lambda: clock[0])
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=5)
+    assert limiter.acquire("a", cost=20) == 0.0
+    # 15 tokens of debt plus one for the next request
+    assert limiter.acquire("a") == 16.0
+    clock[0] += 16.0
+    assert limiter.acquire("a") == 0.0
+
+def test_least_recent_keys_are_evicted():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert list(limiter._buckets) == ["b", "c"]
+    # An evicted key starts again with a full bucket
+    assert limiter.acquire("a") == 0.0
+
+def _enable_limits(monkeypatch, server, **policies):
+    monkeypatch.setattr(server, "RATE_LIMIT_ENABLED", True)
+    for name, (rate, burst) in policies.items():
+        monkeypatch.setattr(server, name, RateLimitPolicy(name, rate, burst))
+
+def test_batch_is_charged_per_unique_input(client, server, monkeypatch):
+    _enable_limits(monkeypatch, server, analysis_rate_limit=(10, 5))
+    batch = {"requests": [{"userInput": f"I like subject {number} very much"} for number in range(6)]}
+    
+    assert client.post("/api/analyze-career/batch", json=batch).status_code == 200
+    response = client.post("/api/analyze-career/batch", json=batch)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+def test_sign_in_is_limited_per_email(client, server, monkeypatch):
+    _enable_limits(monkeypatch, server, auth_rate_limit=(10, 2), auth_ip_rate_limit=(600, 100))
+    attempt = {"email": "limited@school.example", "password": "wrong-password"}
+    
+    assert [client.post("/api/auth/login", json=attempt).status_code for _ in range(3)] == [401, 401, 429]
+    # Another student behind the same IP is unaffected
+    other = {"email": "other@school.example", "password": "wrong-password"}
+    assert client.post("/api/auth/login", json=other).status_code == 401
@@ -0,0 +1,60 @@
+import json
+
+from services import sa_data
+from services.sa_data import CareerIndex, get_institutions_for_career, get_subjects_for_career, load_career_catalogue
+
+def test_titles_need_most_of_an_alias_to_match():
+    assert sa_data.SUBJECTS_INDEX.lookup("Data Scientist") == "Data Scientist"
+    assert sa_data.SUBJECTS_INDEX.lookup("Data Entry Clerk") is None
+
+def test_synonyms_and_extra_words_still_match():
+    assert sa_data.SUBJECTS_INDEX.lookup("Senior Software Engineer") == "Software Developer"
+    assert sa_data.SUBJECTS_INDEX.lookup("Junior Data Analyst") == "Data Scientist"
+    assert sa_data.SUBJECTS_INDEX.lookup("Surgeons") == "Medical Doctor"
+
+def test_generic_words_do_not_match_specific_careers():
+    for title in ("Engineering Manager", "Civil Engineer", "Financial Analyst", "Doctor of Philosophy", "Property Developer"):
+        assert sa_data.SUBJECTS_INDEX.lookup(title) is None, title
+    assert sa_data.PROGRAMME_INDEX.lookup("Doctor of Philosophy") is None
+    assert sa_data.PROGRAMME_INDEX.lookup("Civil Engineer") == "engineering_and_computing"
+
+def test_ties_go_to_the_more_specific_alias_then_the_first_entry():
+    index = CareerIndex([
+        ("general", ["Software Developer"]),
+        ("senior", ["Senior Software Developer"]),
+        ("nurse", ["Nurse"]),
+        ("nursing", ["Nurse"]),
+    ])
+    assert index.lookup("Senior Software Developer") == "senior"
+    assert index.lookup("Software Developer") == "general"
+    assert index.lookup("Nurse") == "nurse"
+
+def test_unknown_careers_get_the_defaults():
+    assert get_subjects_for_career("Astronaut") == sa_data.DEFAULT_SUBJECTS
+    assert get_institutions_for_career("Astronaut") == sa_data.DEFAULT_INSTITUTIONS
+    # Callers get copies they are free to change
+    get_subjects_for_career("Astronaut")["essential"].append("Astronomy")
+    assert "Astronomy" not in sa_data.DEFAULT_SUBJECTS["essential"]
+
+def test_catalogue_file_adds_careers_and_replaces_programme_groups(monkeypatch, tmp_path):
+    monkeypatch.setattr(sa_data, "CAREER_SUBJECTS_MAP", dict(sa_data.CAREER_SUBJECTS_MAP))
+    monkeypatch.setattr(sa_data, "CAREER_SYNONYMS", dict(sa_data.CAREER_SYNONYMS))
+    monkeypatch.setattr(sa_data, "PROGRAMME_GROUPS", list(sa_data.PROGRAMME_GROUPS))
+    monkeypatch.setattr(sa_data, "SUBJECTS_INDEX", sa_data.SUBJECTS_INDEX)
+    monkeypatch.setattr(sa_data, "PROGRAMME_INDEX", sa_data.PROGRAMME_INDEX)
+    
+    nurse = {"essential": ["Life Sciences"], "recommended": ["Mathematics"], "aps_range": "30-40", "min_aps": 30}
+    wits = [{"institution": "Wits", "programme": "Nursing", "duration": "4 years", "aps_required": "30+", "location": "Johannesburg"}]
+    path = tmp_path / "catalogue.json"
+    path.write_text(json.dumps({
+        "careers": {"Registered Nurse": {**nurse, "synonyms": ["Nursing Sister"]}},
+        "programme_groups": [{"name": "medicine", "keywords": ["nurse", "nursing"], "institutions": wits}],
+    }))
+    load_career_catalogue(str(path))
+    
+    assert get_subjects_for_career("Nursing Sister") == nurse
+    assert get_subjects_for_career("Software Developer")["min_aps"] == 35
+    assert get_institutions_for_career("Registered Nurse") == wits
+    # The replaced group no longer has the medicine keywords
+    assert get_institutions_for_career("Surgeon") == sa_data.DEFAULT_INSTITUTIONS
+    assert len(sa_data.PROGRAMME_GROUPS) == 3
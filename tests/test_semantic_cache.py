@@ -0,0 +1,34 @@
+from services.semantic_cache import SemanticAnalysisIndex, embed
+
+def _similarity(first: str, second: str) -> float:
+    a, b = embed(first), embed(second)
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+def test_paraphrases_match():
+    assert _similarity("I like computers and games", "gaming and computers interest me") >= 0.85
+    assert _similarity("I like computers and games", "computers and games") >= 0.85
+    assert _similarity("I love biology", "I enjoy biology") >= 0.85
+
+def test_dislikes_do_not_match_likes():
+    assert _similarity("I hate maths but love art", "I love maths but hate art") < 0.85
+    assert _similarity("I don't like maths", "I like maths") < 0.85
+
+def test_index_reuses_nearest_key_above_threshold():
+    index = SemanticAnalysisIndex(threshold=0.85, max_entries=10)
+    index.add("I like computers and games", "games-key")
+    index.add("I like plants and soil", "plants-key")
+    
+    key, similarity = index.lookup("gaming and computers interest me")
+    assert key == "games-key" and similarity >= 0.85
+    assert index.lookup("I hate computers and games") is None
+    assert index.stats == {"hits": 1, "misses": 1}
+
+def test_index_evicts_least_recently_used():
+    index = SemanticAnalysisIndex(threshold=0.85, max_entries=2)
+    index.add("I like ships", "ships")
+    index.add("I like rocks", "rocks")
+    index.lookup("ships")
+    index.add("I like plants", "plants")
+    
+    assert index.lookup("rocks") is None
+    assert index.lookup("ships")[0] == "ships"
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Response
+from starlette.requests import Request
+
+from memory_db import MemoryClient
+from services.session_cache import MISSING, SessionCache
+from services.simple_auth_service import SimpleAuthService
+
+USER = {"id": "u1", "email": "thandi@example.com", "name": "Thandi"}
+
+def _frozen_clock(monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr("services.session_cache.time.time", lambda: clock[0])
+    return clock
+
+def test_entries_never_outlive_the_session(monkeypatch):
+    clock = _frozen_clock(monkeypatch)
+    cache = SessionCache(ttl_seconds=60, negative_ttl_seconds=30, max_entries=10)
+    session_expires_at = datetime.fromtimestamp(clock[0] + 5, tz=timezone.utc)
+    cache.put("token", USER, session_expires_at.replace(tzinfo=None))
+    
+    assert cache.get("token") == USER
+    clock[0] += 5
+    assert cache.get("token") is None
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = _frozen_clock(monkeypatch)
+    cache = SessionCache(ttl_seconds=60, negative_ttl_seconds=30, max_entries=10)
+    cache.put("token", USER, datetime.now(timezone.utc) + timedelta(days=7))
+    
+    clock[0] += 59
+    assert cache.get("token") == USER
+    clock[0] += 1
+    assert cache.get("token") is None
+
+def test_unknown_tokens_are_remembered_briefly(monkeypatch):
+    clock = _frozen_clock(monkeypatch)
+    cache = SessionCache(ttl_seconds=60, negative_ttl_seconds=30, max_entries=10)
+    cache.put_missing("bad")
+    
+    assert cache.get("bad") is MISSING
+    clock[0] += 30
+    assert cache.get("bad") is None
+    assert cache.stats == {"hits": 0, "negative_hits": 1, "misses": 1}
+
+def _bearer(token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+def test_logout_drops_a_session_cached_while_it_was_being_deleted(monkeypatch):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "4")
+    auth = SimpleAuthService(MemoryClient()["session_cache_test"])
+    sessions = auth.db.sessions
+    delete_one = sessions.delete_one
+    
+    async def run():
+        token = (await auth.register_user("thandi@example.com", "secret123", "Thandi"))["session_token"]
+        
+        async def delete_during_lookup(query):
+            # Another request reads the session just before it is deleted
+            assert await auth.get_current_user(_bearer(token)) is not None
+            return await delete_one(query)
+        
+        monkeypatch.setattr(sessions, "delete_one", delete_during_lookup)
+        await auth.logout_user(_bearer(token), Response())
+        return await auth.get_current_user(_bearer(token))
+    
+    assert asyncio.run(run()) is None
@@ -0,0 +1,58 @@
+import asyncio
+
+from services.single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+    
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"careers": ["Nurse"]}
+    
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+    
+    results = asyncio.run(run())
+    assert len(runs) == 1
+    assert flight.stats == {"executions": 1, "coalesced": 4}
+    assert flight.in_flight == 0
+    # Every caller gets its own copy
+    results[0]["careers"].append("Pilot")
+    assert results[1] == {"careers": ["Nurse"]}
+
+def test_cancelling_one_caller_leaves_the_shared_work_running():
+    flight = SingleFlight()
+    
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+    
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first.cancelled()
+    
+    assert asyncio.run(run()) == ("done", True)
+    assert flight.stats["executions"] == 1
+
+def test_errors_reach_every_caller_and_the_next_call_runs_again():
+    flight = SingleFlight()
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("model unavailable")
+    
+    async def run():
+        results = await asyncio.gather(flight.do("key", work), flight.do("key", work), return_exceptions=True)
+        await asyncio.gather(flight.do("key", work), return_exceptions=True)
+        return results
+    
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 2
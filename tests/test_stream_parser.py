@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from services.stream_parser import IncrementalCareerParser, repair_json
+
+from .factories import make_career
+
+def test_valid_json_needs_no_repairs():
+    assert repair_json('[{"a": 1}]') == ([{"a": 1}], [])
+
+@pytest.mark.parametrize("raw, expected, repair", [
+    ('```json\n[{"a": 1}]\n```', [{"a": 1}], "code_fence"),
+    ('Here you go: [{"a": 1}]', [{"a": 1}], "leading_text"),
+    ('[{"a": 1}] Hope this helps!', [{"a": 1}], "trailing_text"),
+    ('[{"a": 1,}, ]', [{"a": 1}], "trailing_comma"),
+    ('[{“a”: “b”}]', [{"a": "b"}], "smart_quotes"),
+    ('[{"a": "line one\nline two"}]', [{"a": "line one\nline two"}], "control_characters"),
+])
+def test_common_model_mistakes_are_repaired(raw, expected, repair):
+    value, repairs = repair_json(raw)
+    assert value == expected
+    assert repair in repairs
+
+def test_truncated_output_is_closed_at_the_last_complete_member():
+    value, repairs = repair_json('[{"a": 1}, {"b": [1, 2')
+    assert value == [{"a": 1}, {"b": [1, 2]}]
+    assert "truncated" in repairs
+
+def test_a_string_cut_off_part_way_is_dropped_not_closed():
+    value, repairs = repair_json('{"title": "Nurse", "realityCheck": "Salaries typically ')
+    assert value == {"title": "Nurse"}
+    assert "truncated" in repairs
+
+def test_unrecoverable_output_raises():
+    with pytest.raises(ValueError):
+        repair_json("I can't help with that.")
+    with pytest.raises(ValueError):
+        repair_json('{"title": "Nur')
+
+def test_parser_yields_each_career_as_it_completes():
+    text = json.dumps([make_career("Nurse"), make_career("Pilot")])
+    split = text.index("Pilot")
+    parser = IncrementalCareerParser()
+    
+    first = parser.feed("```json\n" + text[:split])
+    assert [career["title"] for career in first] == ["Nurse"]
+    second = parser.feed(text[split:] + "\n```")
+    assert [career["title"] for career in second] == ["Pilot"]
+    assert parser.finished and not parser.truncated
+
+def test_parser_ignores_braces_in_strings_and_brackets_in_prose():
+    career = make_career("Chef", dayInLife={"title": "A Day", "description": "Plating {all} the } dishes ]"})
+    parser = IncrementalCareerParser()
+    careers = parser.feed("Options [2 careers]: " + json.dumps([career]))
+    assert careers == [career]
+
+def test_parser_accepts_a_bare_object_and_unwraps_careers_wrappers():
+    parser = IncrementalCareerParser()
+    assert [c["title"] for c in parser.feed(json.dumps(make_career("Nurse")))] == ["Nurse"]
+    
+    parser = IncrementalCareerParser()
+    wrapped = json.dumps({"careers": [make_career("Nurse"), make_career("Pilot")]})
+    assert [c["title"] for c in parser.feed(wrapped)] == ["Nurse", "Pilot"]
+
+def test_parser_flags_careers_salvaged_from_cut_off_output():
+    text = json.dumps([make_career("Nurse"), make_career("Pilot")])
+    parser = IncrementalCareerParser()
+    careers = parser.feed(text[:-40]) + parser.close()
+    
+    assert [career["title"] for career in careers] == ["Nurse", "Pilot"]
+    assert not parser.was_truncated(careers[0])
+    assert parser.was_truncated(careers[1])
+    assert parser.truncated
+
+def test_parser_drops_malformed_objects_and_counts_them():
+    parser = IncrementalCareerParser()
+    careers = parser.feed('[{"title": "Nurse" "oops"}, ' + json.dumps(make_career("Pilot")) + "]")
+    assert [career["title"] for career in careers] == ["Pilot"]
+    assert parser.stats.careers["dropped"] == 1
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from services.write_buffer import WriteBehindBuffer
+
+class FlakyCollection:
+    def __init__(self, db):
+        self.db = db
+    
+    async def insert_many(self, documents, ordered=True):
+        self.db.attempts.append(time.monotonic())
+        await asyncio.sleep(0.02)
+        if self.db.failures_left > 0 or time.monotonic() < self.db.down_until:
+            self.db.failures_left -= 1
+            raise ConnectionError("mongo unavailable")
+        self.db.written.extend(documents)
+
+class FlakyDB:
+    def __init__(self, failures: int = 0, down_for: float = 0.0):
+        self.failures_left = failures
+        self.down_until = time.monotonic() + down_for
+        self.attempts = []
+        self.written = []
+    
+    def __getitem__(self, name):
+        return FlakyCollection(self)
+
+def _run(db, documents: int, wait: float, **options):
+    async def run():
+        options.setdefault("retry_backoff", 0.01)
+        buffer = WriteBehindBuffer(db, flush_interval=0.01, **options)
+        buffer.start()
+        for number in range(documents):
+            await buffer.add("mentor_requests", {"n": number})
+        await asyncio.sleep(wait)
+        await buffer.stop()
+        return buffer
+    return asyncio.run(run())
+
+def test_stop_during_a_flush_still_writes_the_batch():
+    db = FlakyDB()
+    buffer = _run(db, 5, wait=0.015)
+    assert len(db.written) == 5
+    assert buffer.backlog == 0
+
+def test_failed_batches_are_retried():
+    db = FlakyDB(failures=2)
+    buffer = _run(db, 5, wait=0.2)
+    assert sorted(doc["n"] for doc in db.written) == list(range(5))
+    assert buffer.stats["written"] == 5
+    assert buffer.stats["failed"] == 0
+
+def test_documents_are_given_up_on_after_max_retries():
+    db = FlakyDB(failures=100)
+    buffer = _run(db, 3, wait=0.2, max_retries=2)
+    assert db.written == []
+    assert buffer.stats["failed"] == 3
+    assert buffer.backlog == 0
+
+def test_retries_back_off_to_ride_out_an_outage():
+    # Down for longer than three back-to-back flushes, but not than the backoff
+    db = FlakyDB(down_for=0.3)
+    buffer = _run(db, 3, wait=0.5, max_retries=3, retry_backoff=0.1)
+    assert sorted(doc["n"] for doc in db.written) == list(range(3))
+    assert buffer.stats["failed"] == 0
+    gaps = [later - earlier for earlier, later in zip(db.attempts, db.attempts[1:])]
+    assert gaps[1] > gaps[0] >= 0.1
+
+def test_stop_waits_out_the_backoff_instead_of_spending_retries():
+    db = FlakyDB(failures=2)
+    buffer = _run(db, 2, wait=0.0, max_retries=2, retry_backoff=0.05)
+    assert len(db.written) == 2
+    assert buffer.stats["failed"] == 0